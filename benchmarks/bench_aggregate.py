@@ -0,0 +1,63 @@
+# Rerun latency of the "basic white man" layer: the former explode + groupby + linemerge
+# against the vectorized shapely merge, on full and simplified geometry
+#
+#   python -m benchmarks.bench_aggregate [--country italy] [city ...]
+import argparse
+import time
+
+import geopandas as gpd
+import gender_guesser.detector as gender
+from shapely import geometry, ops
+
+from gender_streets import DATA_DIR
+from gender_streets.artifacts import load_artifact
+from gender_streets.classifier import guess_genders, strip_names
+from gender_streets.layers import merge_gender
+from gender_streets.simplify import simplify_streets
+
+
+# Prebuilt artifact when available, otherwise dictionary-only genders (no NER) as a stand-in
+def labelled_streets(city, country):
+    streets = load_artifact(city, country)
+    if streets is None:
+        streets = gpd.read_file(DATA_DIR / f'{city.lower()}.geojson')
+        d = gender.Detector(case_sensitive=False)
+        streets['gender'] = guess_genders(strip_names(streets.name, country), d, country).values
+    return streets
+
+
+def before(streets):
+    return streets[streets.gender == 'male'].explode().groupby('gender').geometry.apply(lambda x: ops.linemerge(geometry.MultiLineString(x.values))).reset_index().set_crs('epsg:4326', allow_override=True)
+
+
+def after(streets):
+    return merge_gender(streets, 'male', 'basic white man')
+
+
+def best_of(func, streets, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(streets)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('cities', nargs='*', default=['Torino', 'Napoli'])
+    args = parser.parse_args()
+
+    print(f"{'city':<10} {'geometry':<10} {'male':>5} {'before ms':>10} {'after ms':>9} {'speedup':>8}")
+    for city in args.cities:
+        full = labelled_streets(city, args.country)
+        for label, streets in [('full', full), ('simplified', simplify_streets(full))]:
+            t_before, t_after = best_of(before, streets), best_of(after, streets)
+            print(f'{city:<10} {label:<10} {(streets.gender == "male").sum():>5} {t_before * 1000:>10.1f} '
+                  f'{t_after * 1000:>9.1f} {t_before / t_after:>7.1f}x')
+    print('Cached reruns (st.cache_resource on map_layer) skip the merge entirely.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Load time and RSS of data/{city}.geojson through gpd.read_file against the prebuilt artifact
+#
+#   python -m gender_streets.artifacts --country italy   # build first
+#   python -m benchmarks.bench_artifacts --country italy
+import argparse
+import multiprocessing
+import resource
+import time
+
+from gender_streets import DATA_DIR, bundled_cities
+
+
+# Run in a fresh process so the peak RSS belongs to a single load
+def _measure(kind, city, country):
+    import geopandas as gpd
+
+    from gender_streets.artifacts import load_artifact
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if kind == 'geojson':
+        streets = gpd.read_file(DATA_DIR / f'{city}.geojson')
+    else:
+        streets = load_artifact(city, country)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elapsed, (rss_after - rss_before) / 1024, streets is not None
+
+
+def measure(kind, city, country):
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(_measure, (kind, city, country))
+
+
+def main():
+    from gender_streets.artifacts import artifact_path
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('cities', nargs='*')
+    args = parser.parse_args()
+
+    print(f"{'city':<10} {'geojson ms':>11} {'MB':>6} {'artifact ms':>12} {'MB':>6} {'size':>7}")
+    for city in args.cities or bundled_cities():
+        t_json, rss_json, _ = measure('geojson', city, args.country)
+        t_art, rss_art, found = measure('artifact', city, args.country)
+        if not found:
+            print(f'{city:<10} {t_json * 1000:>11.1f} {rss_json:>6.1f} {"not built":>12}')
+            continue
+        ratio = artifact_path(city, args.country).stat().st_size / (DATA_DIR / f'{city}.geojson').stat().st_size
+        print(f'{city:<10} {t_json * 1000:>11.1f} {rss_json:>6.1f} {t_art * 1000:>12.1f} {rss_art:>6.1f} {ratio:>6.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# Throughput and peak memory of the batch classifier on synthetic registries of growing size,
+# against the per-name get_gender loop on a sample
+#
+#   python -m benchmarks.bench_batch [--model it_core_news_sm] [--workers 1 4] [--rows 50000 200000]
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+
+# Registry of unique names built from the bundled street names, one per row
+def synthetic_registry(path, rows):
+    import geopandas as gpd
+
+    from gender_streets import DATA_DIR, bundled_cities
+
+    names = pd.concat([gpd.read_file(DATA_DIR / f'{city}.geojson').name for city in bundled_cities()])
+    names = names.dropna().astype(str).drop_duplicates().reset_index(drop=True)
+    repeat = -(-rows // len(names))
+    registry = pd.concat([names + f' {i}' if i else names for i in range(repeat)], ignore_index=True)[:rows]
+    registry.to_frame('name').to_csv(path, index=False)
+
+
+# Run in a fresh process so the peak RSS belongs to a single run, without the gender cache
+def _measure(source, output, country, model, workers, chunk_size):
+    from gender_streets.batch import classify_file
+
+    start = time.perf_counter()
+    checkpoint = classify_file(source, output, country=country, model=model, workers=workers,
+                               chunk_size=chunk_size, cached=False, restart=True)
+    elapsed = time.perf_counter() - start
+    parent = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return checkpoint['rows'], elapsed, parent, children
+
+
+# Executor processes, unlike Pool ones, may start the workers of the batch classifier
+def measure(*args):
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_measure, *args).result()
+
+
+# Names per second of the reference path, one pipeline call per name
+def reference_rate(source, country, model, sample=2000):
+    from gender_streets.classifier import get_gender, strip_names
+    from gender_streets.resources import registry
+
+    nlp, d = registry().nlp(model), registry().detector()
+    tokens = strip_names(pd.read_csv(source, nrows=sample, dtype=str, keep_default_na=False).name, country)
+    start = time.perf_counter()
+    for t in tokens:
+        get_gender(t, nlp, d, country)
+    return len(tokens) / (time.perf_counter() - start)
+
+
+def main():
+    from gender_streets.classifier import SPACY_MODELS
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('--model')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--rows', type=int, nargs='+', default=[50_000, 200_000])
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    args = parser.parse_args()
+    model = args.model or SPACY_MODELS[args.country]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>8} {'workers':>7} {'seconds':>8} {'names/s':>9} {'main MB':>8} {'worker MB':>10}")
+        for rows in args.rows:
+            source = Path(tmp) / f'registry_{rows}.csv'
+            synthetic_registry(source, rows)
+            for workers in args.workers:
+                done, elapsed, parent, children = measure(str(source), str(Path(tmp) / 'out.csv'), args.country,
+                                                          model, workers, args.chunk_size)
+                print(f'{done:>8} {workers:>7} {elapsed:>8.1f} {done / elapsed:>9.0f} {parent:>8.0f} '
+                      f'{children if workers != 1 else 0:>10.0f}')
+        print(f'get_gender loop: {reference_rate(source, args.country, model):.0f} names/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Memory and cache hit latency of the classified streets of every bundled city: the former
+# frame with object name/gender/gender_color columns behind st.cache_data, which unpickles
+# a copy on every hit, against the compact frame shared by st.cache_resource
+#
+#   python -m benchmarks.bench_cache [--country italy] [--hits 20] [city ...]
+import argparse
+import logging
+import pickle
+import time
+
+import shapely
+import streamlit as st
+
+from benchmarks.bench_aggregate import labelled_streets
+from gender_streets import bundled_cities
+from gender_streets.artifacts import compact_streets
+from gender_streets.classifier import GENDER_COLORS
+
+
+# Same columns and dtypes the app cached before
+def former_streets(streets):
+    streets = streets.drop(columns='length_m').assign(gender_color=streets.gender.map(GENDER_COLORS))
+    return streets.astype({'name': object, 'gender': object, 'gender_color': object})
+
+
+# Bytes of the columns and index, plus the shapely geometries the geometry column points to
+def frame_bytes(streets):
+    return int(streets.memory_usage(deep=True).sum()) + sum(map(len, shapely.to_wkb(streets.geometry.values)))
+
+
+# Median seconds of a call to an already cached function
+def hit_latency(func, city, hits):
+    func(city)
+    times = []
+    for _ in range(hits):
+        start = time.perf_counter()
+        func(city)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('--hits', type=int, default=20)
+    parser.add_argument('cities', nargs='*')
+    args = parser.parse_args()
+    # Outside `streamlit run` the caches work but warn about the missing runtime
+    for name in ('streamlit.runtime.caching.cache_data_api', 'streamlit.runtime.scriptrunner_utils.script_run_context'):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    streets = {city: compact_streets(labelled_streets(city, args.country)) for city in args.cities or bundled_cities()}
+    cache_data = st.cache_data(lambda city: former_streets(streets[city]))
+    cache_resource = st.cache_resource(lambda city: streets[city])
+
+    print(f"{'city':<10} {'streets':>7} {'before KB':>10} {'pickle KB':>10} {'after KB':>9} "
+          f"{'data hit ms':>12} {'resource hit ms':>16}")
+    totals = [0, 0, 0]
+    for city, compact in streets.items():
+        former = former_streets(compact)
+        sizes = [frame_bytes(former), len(pickle.dumps(former)), frame_bytes(compact)]
+        totals = [t + s for t, s in zip(totals, sizes)]
+        t_data, t_resource = hit_latency(cache_data, city, args.hits), hit_latency(cache_resource, city, args.hits)
+        assert cache_resource(city) is cache_resource(city)
+        print(f'{city:<10} {len(compact):>7} {sizes[0] / 1024:>10.0f} {sizes[1] / 1024:>10.0f} {sizes[2] / 1024:>9.0f} '
+              f'{t_data * 1000:>12.2f} {t_resource * 1000:>16.3f}')
+    print(f"{'total':<10} {'':>7} {totals[0] / 1024:>10.0f} {totals[1] / 1024:>10.0f} {totals[2] / 1024:>9.0f}")
+    print('st.cache_data keeps the pickle and hands every hit its own copy of the frame, '
+          'st.cache_resource keeps one frame for all sessions.')
+
+
+if __name__ == '__main__':
+    main()
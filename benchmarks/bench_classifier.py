@@ -0,0 +1,46 @@
+# Names/sec of the per-name get_gender loop against the batched classify_names
+#
+#   python -m benchmarks.bench_classifier --model it_core_news_sm --country italy
+import argparse
+import time
+
+import geopandas as gpd
+import gender_guesser.detector as gender
+import spacy
+
+from gender_streets import DATA_DIR, bundled_cities
+from gender_streets.classifier import classify_names, get_gender, strip_names
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='it_core_news_sm')
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--n-process', type=int, default=1)
+    parser.add_argument('cities', nargs='*')
+    args = parser.parse_args()
+
+    nlp = spacy.load(args.model)
+    d = gender.Detector(case_sensitive=False)
+
+    print(f"{'city':<10} {'names':>6} {'before/s':>10} {'after/s':>10} {'speedup':>8} {'changed':>8}")
+    for city in args.cities or bundled_cities():
+        names = gpd.read_file(DATA_DIR / f'{city}.geojson').name.astype(str).unique()
+
+        start = time.perf_counter()
+        before = strip_names(names, args.country).map(lambda x: get_gender(x, nlp, d, args.country))
+        t_before = time.perf_counter() - start
+
+        start = time.perf_counter()
+        after = classify_names(names, nlp, d, args.country, batch_size=args.batch_size, n_process=args.n_process)
+        t_after = time.perf_counter() - start
+
+        # Only the stop-list of the pre-filter may change a result ("Via Roma" tagged as a person)
+        changed = (before.values != after.values).sum()
+        print(f'{city:<10} {len(names):>6} {len(names) / t_before:>10.0f} {len(names) / t_after:>10.0f} '
+              f'{t_before / t_after:>7.1f}x {changed:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+# Wall time of the comparison of every data/*.geojson city, classified from scratch
+# (no artifacts, no gender cache) serially in this process against a process pool,
+# and from the prebuilt artifacts when they exist
+#
+#   python -m benchmarks.bench_compare [--country italy] [--model it_core_news_sm] [--workers 4]
+import argparse
+import time
+
+from gender_streets import bundled_cities
+from gender_streets.compare import compare_cities
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('--model')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    cities = [c.title() for c in bundled_cities()]
+    runs = [('serial', dict(workers=1, use_artifacts=False, cached=False)),
+            ('parallel', dict(workers=args.workers, use_artifacts=False, cached=False)),
+            ('artifacts', dict(workers=args.workers))]
+    tables = {}
+    for label, kwargs in runs:
+        start = time.perf_counter()
+        tables[label] = compare_cities(cities, args.country, model=args.model, **kwargs)
+        failed = tables[label].error.notna().sum()
+        print(f'{label:>9}: {len(cities)} cities in {time.perf_counter() - start:.1f}s'
+              + (f', {failed} failed' if failed else ''))
+
+    # Same counts whatever the execution
+    columns = ['city', 'female', 'male', 'unknown']
+    serial = tables['serial'][columns].sort_values('city', ignore_index=True)
+    assert serial.equals(tables['parallel'][columns].sort_values('city', ignore_index=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# Refresh of a downloaded city: full re-download and classification of every name against
+# applying an osmChange file, served by the Overpass stand-in, to the stored ways
+#
+#   python -m benchmarks.bench_diffs [--model it_core_news_sm] [--changes 0.02] [city ...]
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import shapely
+
+
+# Function to make a change file touching a fraction of the ways: renames, deletions and
+# new ways, the latter copied from existing geometry under new names
+def synthetic_changes(ways, fraction, seed=0):
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(ways), size=max(3, int(len(ways) * fraction)), replace=False)
+    renamed, deleted, copied = np.array_split(picked, 3)
+    changes = []
+    for i, row in enumerate(ways.iloc[renamed].itertuples()):
+        changes.append(('modify', row.osm_id, row.version + 1, f'Via Ada Lovelace {i}',
+                        shapely.get_coordinates(row.geometry).tolist()))
+    for row in ways.iloc[deleted].itertuples():
+        changes.append(('delete', row.osm_id, row.version + 1, None, None))
+    next_id = int(ways.osm_id.max()) + 1
+    for i, row in enumerate(ways.iloc[copied].itertuples()):
+        changes.append(('create', next_id + i, 1, f'Piazza Grazia Deledda {i}',
+                        shapely.get_coordinates(row.geometry).tolist()))
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('--model')
+    parser.add_argument('--changes', type=float, default=0.02, help='fraction of the ways changed')
+    parser.add_argument('cities', nargs='*', default=['Collegno', 'Torino'])
+    args = parser.parse_args()
+
+    # Read when the package is imported, the graph store and gender cache start empty
+    os.environ['GENDER_STREETS_CACHE'] = tempfile.mkdtemp(prefix='gender_streets_bench_')
+
+    from benchmarks.overpass_stub import OverpassHandler, osmchange_xml, serve, use
+
+    server, url = serve()
+    use(url)
+
+    from gender_streets.artifacts import classify_streets
+    from gender_streets.cache import GenderCache
+    from gender_streets.classifier import SPACY_MODELS
+    from gender_streets.diffs import refresh_city
+    from gender_streets.graphstore import load_edges
+    from gender_streets.ingest import merge_chunks
+    from gender_streets.resources import registry
+    from gender_streets.streets import download_from_osm
+
+    nlp, d = registry().nlp(args.model or SPACY_MODELS[args.country]), registry().detector()
+    cache = GenderCache()
+    for city in args.cities:
+        # First download, which fills the graph store and the gender cache
+        classify_streets(download_from_osm(city), nlp, d, args.country, cache=cache)
+        ways = load_edges(city)
+        changes = synthetic_changes(ways, args.changes)
+        OverpassHandler.diffs[f'{city.lower()}.osc'] = osmchange_xml(changes).encode()
+
+        start = time.perf_counter()
+        classify_streets(download_from_osm(city), nlp, d, args.country)
+        t_full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        streets, report = refresh_city(city, f'{url.rsplit("/api/", 1)[0]}/diffs/{city.lower()}.osc',
+                                       nlp, d, args.country, cache=cache)
+        t_diff = time.perf_counter() - start
+
+        # Same streets as merging every updated way, same genders as classifying from scratch
+        full = merge_chunks([load_edges(city)]).set_index('name')
+        refreshed = streets.set_index('name')
+        assert set(full.index) == set(refreshed.index)
+        assert shapely.equals(full.geometry.loc[refreshed.index].values, refreshed.geometry.values).all()
+        scratch = classify_streets(streets.drop(columns='gender'), nlp, d, args.country)
+        assert (scratch.set_index('name').gender.loc[refreshed.index].values == refreshed.gender.values).all()
+
+        w = report['ways']
+        print(f"{city:<9} {len(ways)} ways, {w['modified']} renamed, {w['deleted']} deleted, {w['created']} created | "
+              f"full refresh {t_full:.2f}s, diff {t_diff:.2f}s ({t_full / t_diff:.1f}x) | "
+              f"{report['remerged']} streets merged again, {report['reclassified']} of {report['names']} names "
+              f"reclassified ({report['reclassified'] / report['names']:.1%})")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Latency and peak memory of OSM ingestion: the osmnx graph path against the streaming
+# named-ways path, both reading the same local extract written from data/{city}.geojson
+#
+#   python -m benchmarks.bench_ingest [city ...]
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import geopandas as gpd
+
+from gender_streets import bundled_cities
+from gender_streets.streets import disk_path
+
+from benchmarks.overpass_stub import serve, use, write_osm
+
+
+# Former download_from_osm, fed from the extract instead of graph_from_place
+def graph_path(path):
+    import osmnx as ox
+    from shapely import geometry, ops
+
+    from gender_streets.streets import transform_name
+
+    graph = ox.graph_from_xml(path, retain_all=True)
+    streets = ox.graph_to_gdfs(graph, nodes=False, edges=True)
+    streets.dropna(subset=['name'], inplace=True)
+    streets.name = streets.name.map(transform_name)
+    return streets.groupby('name').geometry.apply(lambda x: ops.linemerge(geometry.MultiLineString(x.values))).reset_index()
+
+
+def stream_path(source):
+    from gender_streets.ingest import stream_streets
+    return stream_streets(source)
+
+
+def _measure(kind, source, url=None):
+    if url:
+        use(url)
+    import osmnx  # noqa: F401, import cost is not part of the measure
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    streets = graph_path(source) if kind == 'graph' else stream_path(source)
+    elapsed = time.perf_counter() - start
+    return elapsed, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, len(streets)
+
+
+def measure(kind, source, url=None):
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(_measure, (kind, source, url))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('cities', nargs='*')
+    args = parser.parse_args()
+
+    server, url = serve()
+    print(f"{'city':<10} {'graph s':>8} {'MB':>6} {'stream s':>9} {'MB':>6} {'overpass s':>11} {'names':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for city in args.cities or bundled_cities():
+            path = write_osm(gpd.read_file(disk_path(city)), Path(tmp) / f'{city}.osm')
+            t_graph, rss_graph, _ = measure('graph', str(path))
+            t_stream, rss_stream, names = measure('stream', str(path))
+            t_http, _, _ = measure('stream', city.title(), url)
+            print(f'{city:<10} {t_graph:>8.2f} {rss_graph:>6.0f} {t_stream:>9.2f} {rss_stream:>6.0f} {t_http:>11.2f} {names:>6}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# Load test of the background job runner: N simulated sessions polling for the same
+# city and for different cities, ingesting from the local Overpass stand-in
+#
+#   python -m benchmarks.bench_jobs [--sessions 32]
+import argparse
+import statistics
+import threading
+import time
+
+from gender_streets import bundled_cities
+from gender_streets.jobs import JobRunner
+from gender_streets.ingest import stream_streets
+
+from benchmarks.overpass_stub import serve, use
+
+computations = 0
+computations_lock = threading.Lock()
+
+
+def analyze(city, progress=None):
+    global computations
+    with computations_lock:
+        computations += 1
+    return stream_streets(city, progress=progress)
+
+
+# One session: submit like get_streets does, then poll until the job is done
+def session(runner, city, latencies, poll=0.05):
+    start = time.perf_counter()
+    job = runner.submit((city, 'italy'), analyze, city)
+    while not job.done:
+        time.sleep(poll)
+        job = runner.submit((city, 'italy'), analyze, city)
+    latencies.append(time.perf_counter() - start)
+
+
+def run(sessions, cities, workers):
+    global computations
+    computations = 0
+    runner = JobRunner(max_workers=workers)
+    latencies = []
+    threads = [threading.Thread(target=session, args=(runner, cities[i % len(cities)], latencies))
+               for i in range(sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    runner.shutdown()
+    latencies.sort()
+    return wall, computations, statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    server, url = serve()
+    use(url)
+    cities = [c.title() for c in bundled_cities()]
+    print(f"{'scenario':<16} {'sessions':>8} {'jobs run':>9} {'wall s':>7} {'p50 s':>6} {'p95 s':>6}")
+    for label, scenario in [('same city', ['Torino']), ('different cities', cities)]:
+        wall, runs, p50, p95 = run(args.sessions, scenario, args.workers)
+        print(f'{label:<16} {args.sessions:>8} {runs:>9} {wall:>7.2f} {p50:>6.2f} {p95:>6.2f}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
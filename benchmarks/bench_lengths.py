@@ -0,0 +1,71 @@
+# Length-weighted metrics on large cities: reprojecting every street on its own against one
+# UTM projection of the whole city, and the per-district split over a grid of districts
+#
+#   python -m benchmarks.bench_lengths [--country italy] [--grid 6] [city ...]
+import argparse
+import warnings
+
+import geopandas as gpd
+import numpy as np
+import pyproj
+import shapely
+from shapely.ops import transform
+
+from benchmarks.bench_aggregate import best_of, labelled_streets
+from gender_streets.lengths import district_lengths, length_by_gender, street_lengths, utm_streets
+
+
+# One transform and one length per street, as a row by row apply would do
+def naive_lengths(streets):
+    crs = streets.geometry.estimate_utm_crs()
+    lengths = []
+    for geometry in streets.geometry:
+        transformer = pyproj.Transformer.from_crs(streets.crs, crs, always_xy=True)
+        lengths.append(transform(transformer.transform, geometry.union(geometry)).length)
+    return np.array(lengths)
+
+
+# Districts standing in for real ones: a grid of n x n boxes over the city
+def grid_districts(streets, n):
+    minx, miny, maxx, maxy = streets.total_bounds
+    xs, ys = np.linspace(minx, maxx, n + 1), np.linspace(miny, maxy, n + 1)
+    boxes = [shapely.box(xs[i], ys[j], xs[i + 1], ys[j + 1]) for i in range(n) for j in range(n)]
+    return gpd.GeoDataFrame({'name': [f'{i}-{j}' for i in range(n) for j in range(n)]}, geometry=boxes,
+                            crs=streets.crs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('--grid', type=int, default=6, help='districts per side of the grid')
+    parser.add_argument('cities', nargs='*', default=['Napoli', 'Venezia'])
+    args = parser.parse_args()
+    # shapely.ops.transform is what a row by row reprojection uses, deprecated in shapely 2.1
+    warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+    print(f"{'city':<8} {'streets':>7} {'km':>7} {'row ms':>8} {'utm ms':>7} {'speedup':>8} {'stored ms':>10} "
+          f"{'districts':>9} {'split ms':>9} {'female km':>10}")
+    for city in args.cities:
+        streets = labelled_streets(city, args.country).drop(columns='length_m', errors='ignore')
+        t_naive = best_of(naive_lengths, streets, repeat=1)
+        t_utm = best_of(street_lengths, streets)
+        lengths = street_lengths(streets)
+        assert np.allclose(naive_lengths(streets), lengths.values, rtol=1e-6)
+
+        # What the page pays once the lengths are stored with the classified streets
+        stored = streets.assign(length_m=lengths)
+        t_stored = best_of(length_by_gender, stored)
+
+        # The split reuses the projection kept with the classified streets
+        districts, utm = grid_districts(streets, args.grid), utm_streets(streets)
+        t_split = best_of(lambda s: district_lengths(s, districts, utm=utm), streets)
+        table = district_lengths(streets, districts, utm=utm)
+        # The grid covers the whole city, so the districts add up to the city
+        assert np.isclose(table.total.sum(), lengths.sum(), rtol=1e-6)
+        print(f'{city:<8} {len(streets):>7} {lengths.sum() / 1000:>7.0f} {t_naive * 1000:>8.0f} {t_utm * 1000:>7.1f} '
+              f'{t_naive / t_utm:>7.0f}x {t_stored * 1000:>10.2f} {len(districts):>9} {t_split * 1000:>9.1f} '
+              f'{table.female.sum() / 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Per-token Detector.get_gender calls against the precompiled lookup
+# (tests/test_lookup.py checks that both agree)
+#
+#   python -m benchmarks.bench_lookup
+import argparse
+import time
+
+import geopandas as gpd
+import gender_guesser.detector as gender
+
+from gender_streets import DATA_DIR, bundled_cities
+from gender_streets.classifier import SPACY_MODELS, gender_lookup, guess_gender, guess_genders, strip_names
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--country', action='append')
+    parser.add_argument('cities', nargs='*')
+    args = parser.parse_args()
+
+    d = gender.Detector(case_sensitive=False)
+    for country in args.country or list(SPACY_MODELS):
+        start = time.perf_counter()
+        gender_lookup(d, country)
+        guess_genders(strip_names([], country), d, country)
+        print(f'{country}: lookup tables built in {(time.perf_counter() - start) * 1000:.0f} ms')
+        print(f"{'city':<10} {'names':>6} {'per-call ms':>12} {'lookup ms':>10} {'mismatches':>10}")
+        for city in args.cities or bundled_cities():
+            names = gpd.read_file(DATA_DIR / f'{city}.geojson').name.astype(str).unique()
+            tokens = strip_names(names, country)
+
+            start = time.perf_counter()
+            before = tokens.map(lambda x: guess_gender(x, d, country))
+            t_before = time.perf_counter() - start
+
+            start = time.perf_counter()
+            after = guess_genders(tokens, d, country)
+            t_after = time.perf_counter() - start
+
+            print(f'{city:<10} {len(names):>6} {t_before * 1000:>12.1f} {t_after * 1000:>10.1f} '
+                  f'{int((before != after).sum()):>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# Cold start and per-session memory of the NLP resources: the former st.cache_data
+# pattern (full model plus two detectors, unpickled for every caller) against the
+# shared registry (one trimmed model per process, handed out by reference)
+#
+#   python -m benchmarks.bench_resources [--model it_core_news_sm] [--sessions 8]
+import argparse
+import multiprocessing
+import pickle
+import time
+
+
+def _before(model, sessions):
+    import gender_guesser.detector as gender
+    import spacy
+
+    from gender_streets.resources import rss_mb
+
+    rss_start, start = rss_mb(), time.perf_counter()
+    gender.Detector(case_sensitive=False)
+    cached = pickle.dumps((spacy.load(model), gender.Detector(case_sensitive=False)))
+    first = None
+    held = []
+    for _ in range(sessions):
+        # st.cache_data returns an unpickled copy on every call
+        held.append(pickle.loads(cached))
+        first = first or time.perf_counter() - start
+    return first, rss_mb() - rss_start
+
+
+def _after(model, sessions):
+    import gender_guesser.detector  # noqa: F401, same imports as before
+    import spacy  # noqa: F401
+
+    from gender_streets.resources import registry, rss_mb
+
+    rss_start, start = rss_mb(), time.perf_counter()
+    first = None
+    held = []
+    for _ in range(sessions):
+        held.append((registry().nlp(model), registry().detector()))
+        first = first or time.perf_counter() - start
+    return first, rss_mb() - rss_start
+
+
+def measure(func, model, sessions):
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(func, (model, sessions))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='it_core_news_sm')
+    parser.add_argument('--sessions', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'':<9} {'first use s':>12} {'RSS MB':>8} {'per session MB':>15}")
+    for label, func in [('before', _before), ('after', _after)]:
+        first, rss = measure(func, args.model, args.sessions)
+        print(f'{label:<9} {first:>12.2f} {rss:>8.1f} {rss / args.sessions:>15.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Throughput and latency of the HTTP service over the bundled cities: cold requests that go
+# to the worker pool, warm ones served from the response cache and ETag revalidations
+#
+#   python -m benchmarks.bench_service [--model it_core_news_sm] [--clients 8] [--requests 400]
+import argparse
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+# Function to start the service on a background thread, returns the server and its URL
+def serve(workers, model, port=8765):
+    import uvicorn
+
+    from gender_streets.service import create_app
+
+    server = uvicorn.Server(uvicorn.Config(create_app(workers, model), host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f'http://127.0.0.1:{port}'
+
+
+# Function to send requests from concurrent clients, returns the latencies and wall time
+def load(paths, clients, etags=None):
+    local = threading.local()
+
+    def get(path):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        headers = {'If-None-Match': etags[path]} if etags else {}
+        start = time.perf_counter()
+        response = local.session.get(path, headers=headers)
+        elapsed = time.perf_counter() - start
+        assert response.status_code == (304 if etags else 200), (path, response.status_code)
+        return elapsed, response.headers.get('ETag')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        results = list(pool.map(get, paths))
+    return [r[0] for r in results], time.perf_counter() - start, {p: r[1] for p, r in zip(paths, results)}
+
+
+def report(label, latencies, wall):
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(f'{label:<11} {len(latencies):>6} {len(latencies) / wall:>9.1f} {q[49] * 1000:>8.1f} '
+          f'{q[94] * 1000:>8.1f} {q[98] * 1000:>8.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400)
+    args = parser.parse_args()
+
+    from gender_streets import bundled_cities
+
+    server, url = serve(args.workers, args.model)
+    cities = [c.title() for c in bundled_cities()]
+    endpoints = [f'{url}/cities/{c}/stats' for c in cities] + [f'{url}/cities/{c}/streets?simplified=1' for c in cities]
+
+    print(f"{'phase':<11} {'reqs':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    latencies, wall, etags = load(endpoints, args.clients)
+    report('cold', latencies, wall)
+    paths = random.Random(0).choices(endpoints, k=args.requests)
+    latencies, wall, _ = load(paths, args.clients)
+    report('warm', latencies, wall)
+    latencies, wall, _ = load(paths, args.clients, etags)
+    report('revalidate', latencies, wall)
+    server.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
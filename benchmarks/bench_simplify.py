@@ -0,0 +1,50 @@
+# Folium payload size and render time of every bundled city, full resolution against simplified
+#
+#   python -m benchmarks.bench_simplify
+import argparse
+import time
+
+import folium
+import geopandas as gpd
+
+from gender_streets import DATA_DIR, bundled_cities
+from gender_streets.classifier import GENDER_COLORS
+from gender_streets.simplify import simplify_streets, zoom_for_bounds
+
+
+# Same layer the pages build in plot_graphto_folium, rendered to the HTML sent to the browser
+def render(streets):
+    start = time.perf_counter()
+    graph_map = folium.Map(tiles=None)
+    folium.GeoJson(streets, style_function=lambda feature: {
+        "color": GENDER_COLORS[feature["properties"]["gender"]],
+        "weight": 3,
+    }, popup=folium.GeoJsonPopup(fields=["name"])).add_to(graph_map)
+    html = graph_map.get_root().render()
+    return len(html.encode()), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--zoom', type=int, help='defaults to the zoom that fits each city')
+    parser.add_argument('cities', nargs='*')
+    args = parser.parse_args()
+
+    print(f"{'city':<10} {'zoom':>4} {'full KB':>9} {'ms':>7} {'simple KB':>10} {'ms':>7} {'simplify ms':>12} {'ratio':>6}")
+    for city in args.cities or bundled_cities():
+        streets = gpd.read_file(DATA_DIR / f'{city}.geojson')
+        streets['gender'] = 'unknown'
+        zoom = args.zoom or zoom_for_bounds(streets.total_bounds)
+
+        start = time.perf_counter()
+        simplified = simplify_streets(streets, zoom)
+        t_simplify = time.perf_counter() - start
+
+        full_bytes, t_full = render(streets)
+        simple_bytes, t_simple = render(simplified)
+        print(f'{city:<10} {zoom:>4} {full_bytes / 1024:>9.0f} {t_full * 1000:>7.0f} {simple_bytes / 1024:>10.0f} '
+              f'{t_simple * 1000:>7.0f} {t_simplify * 1000:>12.1f} {simple_bytes / full_bytes:>6.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# Startup cost of a language page: import time of the libraries each page used to pull
+# in at the top against the slim gender_streets.app entry point, both in a fresh
+# interpreter, and time to first paint of the page with streamlit's AppTest
+#
+#   python -m benchmarks.bench_startup [--page pages/1_italiano.py] [--repeat 3]
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Top of the pages before the shared gender_streets.app module
+BEFORE = ['streamlit', 'osmnx', 'pandas', 'folium', 'streamlit_folium', 'shapely', 'geopandas',
+          'streamlit_extras.switch_page_button', 'streamlit.source_util',
+          'gender_streets.artifacts', 'gender_streets.cache', 'gender_streets.jobs', 'gender_streets.layers',
+          'gender_streets.resources', 'gender_streets.simplify', 'gender_streets.stats',
+          'gender_streets.streets', 'gender_streets.topojson']
+AFTER = ['gender_streets.app']
+
+
+# Function to time the import of some modules in a fresh interpreter, skipping the missing ones
+def import_time(modules):
+    code = ('import importlib\n'
+            f'for module in {modules!r}:\n'
+            '    try:\n'
+            '        importlib.import_module(module)\n'
+            '    except ImportError as e:\n'
+            '        print("skipped", module, e)\n')
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], check=True)
+    return time.perf_counter() - start
+
+
+# Function to time the first run of a page, up to the city selection and summary
+def first_paint(page):
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    at = AppTest.from_file(os.path.abspath(page), default_timeout=600).run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--page', default='pages/1_italiano.py')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # The first interpreter also warms up the file system cache
+    import_time(BEFORE)
+    baseline = min(import_time(['streamlit']) for _ in range(args.repeat))
+    for label, code in (('before', BEFORE), ('after', AFTER)):
+        best = min(import_time(code) for _ in range(args.repeat))
+        print(f'{label:>6}: imports {best:.2f}s ({best - baseline:.2f}s on top of streamlit)')
+
+    # Run in a fresh interpreter so that the page imports are part of the measure
+    code = f'from benchmarks.bench_startup import first_paint; print(first_paint({args.page!r}))'
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True)
+    print(f'first paint of {args.page}: {float(out.stdout.split()[-1]):.2f}s')
+
+
+if __name__ == '__main__':
+    main()
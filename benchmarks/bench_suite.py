@@ -0,0 +1,186 @@
+# Benchmark and regression suite over the bundled data/*.geojson cities
+#
+#   python -m benchmarks.bench_suite [--country italy] [--model it_core_news_sm] [city ...]
+#   python -m benchmarks.bench_suite --model always_per       # no downloaded model, see STAND_IN
+#   python -m benchmarks.bench_suite --update-golden          # after an intended accuracy change
+#   python -m benchmarks.bench_suite --compare benchmarks/results/<commit>.json
+#
+# For every city it times load_from_disk, the reference get_gender and the batched
+# classify_names over the unique names, the app path of download_streets_and_infer_gender
+# with the Streamlit and gender caches bypassed, the male streets aggregation and the
+# Folium map (time and size of the HTML). Gender counts are checked against
+# benchmarks/golden_counts.json, per model and country, and the results are written
+# to benchmarks/results/<commit>.json so that runs can be compared across commits.
+# The golden counts of the stand-in model are also checked by tests/test_golden.py.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+GOLDEN_PATH = BENCH_DIR / 'golden_counts.json'
+RESULTS_DIR = BENCH_DIR / 'results'
+
+# Metrics compared across runs, lower is better
+TIMINGS = ['load_from_disk', 'get_gender', 'classify_names', 'app_path', 'aggregation', 'folium']
+
+# Stand-in model that tags every name as a person, so its counts only depend on the
+# pre-filter and the gender lookup and are reproducible without a downloaded model
+STAND_IN = 'always_per'
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+# Function to write the stand-in model to a directory, returns its path
+def stand_in_model(path):
+    import spacy
+
+    nlp = spacy.blank('it')
+    nlp.add_pipe('entity_ruler').add_patterns([{'label': 'PER', 'pattern': [{'IS_ALPHA': True, 'OP': '+'}]}])
+    nlp.to_disk(path)
+    return str(path)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# Function to run every benchmark on one city
+def bench_city(city, country, nlp, d, repeat):
+    from gender_streets.app import plot_graphto_folium
+    from gender_streets.cache import GenderCache
+    from gender_streets.classifier import GENDERS, classify_names, get_gender, strip_names
+    from gender_streets.layers import MALE_LAYER_NAME, merge_gender
+    from gender_streets.streets import classified_city, load_from_disk
+
+    result = {}
+    result['load_from_disk'], streets = best_of(lambda: load_from_disk(city), repeat)
+    names = streets.name.astype(str).drop_duplicates()
+    tokens = strip_names(names, country)
+    result['streets'], result['names'] = len(streets), len(names)
+
+    # The reference path is slow with real models, so it only runs once
+    result['get_gender'], reference = best_of(lambda: [get_gender(t, nlp, d, country) for t in tokens], 1)
+    result['classify_names'], genders = best_of(lambda: classify_names(names, nlp, d, country), repeat)
+    result['reference_agreement'] = round(float((genders.values == reference).mean()), 4) if len(names) else 1.0
+
+    # What download_streets_and_infer_gender runs for a listed city past st.cache_resource,
+    # with the models of this run and the gender cache pointed at an empty directory
+    app_path = lambda: classified_city(city, country, lambda: (nlp, d), cache=GenderCache())
+    result['app_path'], classified = best_of(app_path, 1)
+    result['counts'] = {g: int((classified.gender == g).sum()) for g in GENDERS}
+
+    result['aggregation'], _ = best_of(lambda: merge_gender(classified, 'male', MALE_LAYER_NAME), repeat)
+    result['male_streets'] = int((classified.gender == 'male').sum())
+
+    def render():
+        graphmap = plot_graphto_folium(classified, tiles='Cartodb positron')
+        return graphmap.get_root().render()
+    result['folium'], html = best_of(render, repeat)
+    result['folium_bytes'] = len(html.encode())
+    return result
+
+
+# Function to compare the counts of a run with the golden ones, returning the mismatches
+def check_golden(results, golden):
+    mismatches = []
+    for city, result in results.items():
+        expected = golden.get(city)
+        if expected is not None and expected != result['counts']:
+            mismatches.append(f'{city}: expected {expected}, got {result["counts"]}')
+    return mismatches
+
+
+# Function to print the timings of a run against a previous results file
+def compare(results, path):
+    previous = json.loads(Path(path).read_text())
+    print(f"\nagainst {previous['commit']} ({path})")
+    print(f"{'city':<10}" + ''.join(f'{m:>16}' for m in TIMINGS))
+    for city, result in results.items():
+        old = previous['cities'].get(city)
+        if old is None:
+            continue
+        ratios = [result[m] / old[m] if old.get(m) else float('nan') for m in TIMINGS]
+        print(f'{city:<10}' + ''.join(f'{r:>15.2f}x' for r in ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('--model', help='spaCy model, defaults to the one of the country')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='results file, defaults to benchmarks/results/<commit>.json')
+    parser.add_argument('--compare', help='previous results file to compare the timings with')
+    parser.add_argument('--update-golden', action='store_true', help='store the counts of this run as golden')
+    parser.add_argument('cities', nargs='*')
+    args = parser.parse_args()
+
+    # Set before the first import of the package, which reads it
+    os.environ['GENDER_STREETS_CACHE'] = tempfile.mkdtemp(prefix='gender_streets_bench_')
+    from gender_streets import bundled_cities
+    from gender_streets.artifacts import artifact_path
+    from gender_streets.classifier import SPACY_MODELS
+    from gender_streets.resources import registry
+
+    model = args.model or SPACY_MODELS[args.country]
+    if model == STAND_IN:
+        nlp = registry().nlp(stand_in_model(Path(tempfile.mkdtemp(prefix='gender_streets_bench_')) / STAND_IN))
+    else:
+        nlp = registry().nlp(model)
+    d = registry().detector()
+
+    results = {}
+    for city in args.cities or [c.title() for c in bundled_cities()]:
+        if artifact_path(city, args.country).exists():
+            print(f'{city}: has a prebuilt artifact, the app path will read it instead of classifying')
+        results[city] = bench_city(city, args.country, nlp, d, args.repeat)
+        r = results[city]
+        print(f"{city:<10} {r['streets']:>5} streets {r['names']:>5} names | load {r['load_from_disk'] * 1000:7.1f}ms "
+              f"get_gender {r['get_gender']:6.2f}s classify_names {r['classify_names']:6.2f}s "
+              f"app {r['app_path']:6.2f}s | aggregation {r['aggregation'] * 1000:6.1f}ms "
+              f"folium {r['folium'] * 1000:6.1f}ms {r['folium_bytes'] / 2 ** 20:5.1f}MB | {r['counts']}")
+
+    commit = git_commit()
+    output = Path(args.output or RESULTS_DIR / f'{commit}.json')
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({'commit': commit, 'time': time.time(), 'model': model, 'country': args.country,
+                                  'python': sys.version.split()[0], 'cities': results}, indent=2))
+    print(f'results written to {output}')
+
+    if args.compare:
+        compare(results, args.compare)
+
+    golden = json.loads(GOLDEN_PATH.read_text()) if GOLDEN_PATH.exists() else {}
+    expected = golden.setdefault(model, {}).setdefault(args.country, {})
+    if args.update_golden:
+        expected.update({city: r['counts'] for city, r in results.items()})
+        GOLDEN_PATH.write_text(json.dumps(golden, indent=2, sort_keys=True) + '\n')
+        print(f'golden counts of {model} ({args.country}) written to {GOLDEN_PATH}')
+    elif not expected:
+        print(f'no golden counts for {model} ({args.country}), run with --update-golden to store them')
+    else:
+        mismatches = check_golden(results, expected)
+        for line in mismatches:
+            print(f'REGRESSION {line}')
+        if mismatches:
+            sys.exit(1)
+        print('gender counts match the golden ones')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Cost of one map update on large cities: centering on unary_union against total_bounds,
+# and serializing the whole layer against the streets of one viewport from the STRtree
+#
+#   python -m benchmarks.bench_viewport [--country italy] [--zoom-in 4] [city ...]
+import argparse
+import json
+import time
+import warnings
+
+from benchmarks.bench_aggregate import best_of, labelled_streets
+from gender_streets.layers import gender_layer
+from gender_streets.simplify import simplify_streets
+from gender_streets.viewport import StreetIndex
+
+
+def layer_bytes(streets):
+    return len(json.dumps(streets[['name', 'gender', 'geometry']].__geo_interface__).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('--zoom-in', type=int, default=4, help='the viewport spans 1/n of the city on each axis')
+    parser.add_argument('cities', nargs='*', default=['Venezia', 'Napoli'])
+    args = parser.parse_args()
+    # unary_union is what the map used before, deprecated in recent geopandas
+    warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+    print(f"{'city':<8} {'layer':<7} {'union ms':>9} {'bounds ms':>10} {'index ms':>9} "
+          f"{'all':>5} {'MB':>6} {'json ms':>8} {'view':>5} {'MB':>6} {'query+json ms':>14}")
+    for city in args.cities:
+        streets = simplify_streets(labelled_streets(city, args.country))
+        for female_only in (True, False):
+            layer = gender_layer(streets, female_only)
+            t_union = best_of(lambda s: s.unary_union.centroid, layer)
+            t_bounds = best_of(lambda s: s.total_bounds, layer)
+            start = time.perf_counter()
+            index = StreetIndex(layer)
+            t_index = time.perf_counter() - start
+
+            # A view around the center of the city
+            minx, miny, maxx, maxy = index.bounds
+            cx, cy = (minx + maxx) / 2, (miny + maxy) / 2
+            dx, dy = (maxx - minx) / args.zoom_in / 2, (maxy - miny) / args.zoom_in / 2
+            view_bounds = (cx - dx, cy - dy, cx + dx, cy + dy)
+
+            t_all = best_of(layer_bytes, layer)
+            t_view = best_of(lambda i: layer_bytes(i.query(view_bounds)), index)
+            view = index.query(view_bounds)
+            print(f"{city:<8} {'female' if female_only else 'all':<7} {t_union * 1000:>9.1f} {t_bounds * 1000:>10.2f} "
+                  f"{t_index * 1000:>9.1f} {len(layer):>5} {layer_bytes(layer) / 2 ** 20:>6.2f} {t_all * 1000:>8.1f} "
+                  f"{len(view):>5} {layer_bytes(view) / 2 ** 20:>6.2f} {t_view * 1000:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
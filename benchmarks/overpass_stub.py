@@ -0,0 +1,169 @@
+# Local Overpass stand-in serving the bundled data/*.geojson cities as OSM XML, with the
+# Nominatim search that geocodes their names to the areas it serves
+#
+#   python -m benchmarks.overpass_stub --port 8765
+#   GENDER_STREETS_OVERPASS_URL=http://localhost:8765/api/interpreter \
+#   GENDER_STREETS_NOMINATIM_URL=http://localhost:8765 streamlit run 0_gender_streets.py
+#
+# write_osm also writes a raw extract (nodes + ways) readable by osmnx.graph_from_xml, and
+# osmChange files put in OverpassHandler.diffs are served on /diffs/<name>.
+import argparse
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from xml.sax.saxutils import quoteattr
+
+import geopandas as gpd
+import shapely
+
+from gender_streets import bundled_cities
+from gender_streets.ingest import AREA_OFFSETS
+from gender_streets.streets import disk_path
+
+
+# Function to get the relation id a bundled city is geocoded to, None for other places
+def relation_id(place):
+    city = place.partition(',')[0].strip().lower()
+    cities = bundled_cities()
+    return cities.index(city) + 1 if city in cities else None
+
+
+# Function to render the Nominatim search results of a place, one relation for a bundled city
+def nominatim_json(place):
+    osm_id = relation_id(place)
+    if osm_id is None:
+        return []
+    city = bundled_cities()[osm_id - 1]
+    hull = shapely.convex_hull(shapely.union_all(gpd.read_file(disk_path(city)).geometry.values))
+    minx, miny, maxx, maxy = hull.bounds
+    return [{'place_id': osm_id, 'osm_type': 'relation', 'osm_id': osm_id, 'lat': str(hull.centroid.y),
+             'lon': str(hull.centroid.x), 'boundingbox': [str(miny), str(maxy), str(minx), str(maxx)],
+             'class': 'boundary', 'type': 'administrative', 'importance': 0.5, 'display_name': city.title(),
+             'geojson': shapely.geometry.mapping(hull)}]
+
+
+def _parts(streets):
+    parts, index = shapely.get_parts(streets.geometry.values, return_index=True)
+    return [(row, shapely.get_coordinates(part).tolist()) for row, part in zip(index, parts)]
+
+
+# Function to render streets as Overpass "out geom" XML, one way per line part
+def overpass_xml(streets):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<osm version="0.6" generator="overpass-stub">']
+    for way_id, (row, coords) in enumerate(_parts(streets), start=1):
+        lines.append(f'<way id="{way_id}" version="1">')
+        lines.extend(f'<nd ref="0" lat="{y}" lon="{x}"/>' for x, y in coords)
+        lines.append(f'<tag k="highway" v="residential"/><tag k="name" v={quoteattr(streets.name.iloc[row])}/></way>')
+    lines.append('</osm>')
+    return '\n'.join(lines)
+
+
+# Function to write streets as a raw OSM extract, shared coordinates become shared nodes
+def write_osm(streets, path):
+    node_ids, ways = {}, []
+    for row, coords in _parts(streets):
+        refs = [node_ids.setdefault(tuple(c), len(node_ids) + 1) for c in coords]
+        ways.append((row, refs))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6" generator="overpass-stub">\n')
+        for (x, y), node_id in node_ids.items():
+            f.write(f'<node id="{node_id}" version="1" lat="{y}" lon="{x}"/>\n')
+        for way_id, (row, refs) in enumerate(ways, start=1):
+            f.write(f'<way id="{way_id}" version="1">')
+            f.write(''.join(f'<nd ref="{r}"/>' for r in refs))
+            f.write(f'<tag k="highway" v="residential"/><tag k="name" v={quoteattr(streets.name.iloc[row])}/></way>\n')
+        f.write('</osm>\n')
+    return path
+
+
+# Function to render way changes, (action, osm_id, version, name, coordinates), as an
+# osmChange file with the coordinates on the nd elements
+def osmchange_xml(changes):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<osmChange version="0.6" generator="overpass-stub">']
+    for action, osm_id, version, name, coords in changes:
+        lines.append(f'<{action}><way id="{osm_id}" version="{version}">')
+        lines.extend(f'<nd ref="0" lat="{y}" lon="{x}"/>' for x, y in coords or [])
+        if name is not None:
+            lines.append(f'<tag k="highway" v="residential"/><tag k="name" v={quoteattr(name)}/>')
+        lines.append(f'</way></{action}>')
+    lines.append('</osmChange>')
+    return '\n'.join(lines)
+
+
+class OverpassHandler(BaseHTTPRequestHandler):
+    # osmChange files served on /diffs/<name>
+    diffs = {}
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+        self._answer(parse_qs(body).get('data', [''])[0])
+
+    def do_GET(self):
+        if self.path.startswith('/search'):
+            data = json.dumps(nominatim_json(parse_qs(self.path.partition('?')[2]).get('q', [''])[0])).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if self.path.startswith('/diffs/'):
+            data = self.diffs.get(self.path[len('/diffs/'):])
+            self.send_response(200 if data else 404)
+            if data:
+                self.send_header('Content-Type', 'application/xml')
+                self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data or b'')
+            return
+        self._answer(parse_qs(self.path.partition('?')[2]).get('data', [''])[0])
+
+    def _answer(self, query):
+        match = re.search(r'area\((\d+)\)', query)
+        osm_id = int(match.group(1)) - AREA_OFFSETS['relation'] if match else 0
+        cities = bundled_cities()
+        path = disk_path(cities[osm_id - 1]) if 0 < osm_id <= len(cities) else None
+        if path is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = overpass_xml(gpd.read_file(path)).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/osm3s+xml')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+# Function to start the stand-in on a background thread, returns the server and its URL
+def serve(port=0):
+    server = ThreadingHTTPServer(('127.0.0.1', port), OverpassHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/api/interpreter'
+
+
+# Function to send the Overpass queries and Nominatim searches of this process to a stand-in
+def use(url):
+    from gender_streets import ingest
+
+    ingest.OVERPASS_URL = url
+    ingest.NOMINATIM_URL = url.rpartition('/api/')[0]
+    ingest.area_id.cache_clear()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), OverpassHandler)
+    print(f'Overpass stand-in on http://127.0.0.1:{args.port}/api/interpreter')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+# Shared data and NLP pipeline used by the Streamlit pages
+import os
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT_DIR / 'data'
+CACHE_DIR = Path(os.environ.get('GENDER_STREETS_CACHE', ROOT_DIR / '.cache'))
+ARTIFACTS_DIR = Path(os.environ.get('GENDER_STREETS_ARTIFACTS', DATA_DIR / 'artifacts'))
+
+# Layer format of the streets map: 'geojson' (one feature collection) or 'topojson' (shared arcs)
+MAP_BACKEND = os.environ.get('GENDER_STREETS_MAP_BACKEND', 'geojson')
+
+# Pre-defined list of cities for the app
+DEFAULT_CITIES = ["Aosta", "Torino", "Genova", "Milano", "Trento", "Venezia", "Trieste",
+                  "Bologna", "Firenze", "Ancona", "Perugia", "Roma", "L'Aquila", "Campobasso", "Napoli", "Bari",
+                  "Potenza", "Catanzaro", "Palermo", "Cagliari"]
+
+
+# Function to list the cities bundled as data/{city}.geojson
+def bundled_cities():
+    return sorted(p.stem for p in DATA_DIR.glob('*.geojson'))
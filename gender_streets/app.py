@@ -0,0 +1,438 @@
+# Streamlit app shared by the language pages, which only hold the localized strings
+#
+# Heavy libraries (geopandas, folium, spaCy, ...) are imported inside the functions
+# that need them, and every cached function is keyed by gender_guesser country, so
+# the Italian and English pages share one cache and one set of loaded models.
+#
+# Classified streets and the layers derived from them are st.cache_resource: every
+# session gets the same frame instead of an unpickled copy, so they are never modified
+# in place; copy-on-write, the default since pandas 3 (pinned in requirements.txt), keeps
+# the frames derived from them separate.
+import os
+import time
+
+import streamlit as st
+
+from gender_streets import DEFAULT_CITIES, MAP_BACKEND
+from gender_streets.jobs import default_runner
+from gender_streets.metrics import incr, log_runs, metrics, stage
+
+# Pre-defined list of cities for the app
+default_cities = DEFAULT_CITIES
+
+# Background analyses of the cities that are not in the list, shared by all sessions
+city_jobs = default_runner()
+
+# Classified cities kept in memory: the whole list plus this many typed ones, the least
+# recently used are dropped beyond it
+MAX_CACHED_CITIES = len(default_cities) + 12
+
+# Map variants kept in memory, one per city, toggle state and zoom bucket
+MAX_CACHED_MAPS = 32
+
+# One JSON line per page run and background job on stderr
+log_runs()
+
+
+# Function to load the NLP model of a country, once per process and
+# only when a city actually has to be classified
+def load_nlp(country):
+    from gender_streets.classifier import SPACY_MODELS
+    from gender_streets.resources import registry
+
+    resources = registry()
+    return resources.nlp(SPACY_MODELS[country]), resources.detector()
+
+
+# Persistent name -> gender cache shared by all cities and languages
+@st.cache_resource
+def gender_cache():
+    from gender_streets.cache import GenderCache
+    return GenderCache()
+
+
+# Function to download streets and infer gender
+@st.cache_resource(max_entries=MAX_CACHED_CITIES)
+def download_streets_and_infer_gender(city, country, default_cities=default_cities):
+    from gender_streets.streets import classified_city
+
+    from gender_streets.streets import has_local_data
+
+    if city is None:
+        return []
+    if city in default_cities and has_local_data(city, country):
+        # Prebuilt artifacts already carry the gender, no NLP needed
+        return classified_city(city, country, lambda: load_nlp(country), cache=gender_cache())
+    # Started by get_streets, which only calls this function once the job is done; it is
+    # started again if it has been forgotten in between
+    return city_jobs.submit((city, country), analyze_city, city, country).wait()
+
+
+# Function to run in the background job of a city that is not in the list
+def analyze_city(city, country, progress=None):
+    from gender_streets.streets import analyze_city
+
+    return analyze_city(city, *load_nlp(country), country, cache=gender_cache(), progress=progress)
+
+
+# Function to get the classified streets: cities that are not in the list, or listed ones
+# with no local data, are analyzed in a background job shared by all sessions, and the
+# page polls it until it is done
+def get_streets(city, country, strings):
+    from gender_streets.streets import has_local_data
+
+    if city in default_cities and has_local_data(city, country):
+        return download_streets_and_infer_gender(city, country)
+    job = city_jobs.submit((city, country), analyze_city, city, country)
+    if job.status == 'failed':
+        import geopandas as gpd
+
+        st.write(strings['error'])
+        st.session_state.proceed = False
+        return gpd.GeoDataFrame()
+    if job.status != 'done':
+        info = job.progress
+        st.progress(info.get('fraction') or 0.0, text=strings['progress'].format(**info) if info else strings['queued'])
+        if 'female' in info:
+            st.caption(strings['partial'].format(**info))
+        time.sleep(1)
+        st.rerun()
+    return download_streets_and_infer_gender(city, country)
+
+
+# Function to compute the summary statistics once per city and language
+@st.cache_data(max_entries=MAX_CACHED_CITIES)
+def summary_stats(city, country):
+    from gender_streets.artifacts import load_stats
+    from gender_streets.stats import city_stats
+
+    stats = load_stats(city, country) if city in default_cities else None
+    if stats is None:
+        stats = city_stats(download_streets_and_infer_gender(city, country), city, country)
+    return stats
+
+
+# Function to project the streets of a city to its UTM zone, once per process and kept with
+# the classified streets for everything measured in meters
+@st.cache_resource(max_entries=MAX_CACHED_CITIES)
+def projected_streets(city, country):
+    from gender_streets.lengths import utm_streets
+
+    return utm_streets(download_streets_and_infer_gender(city, country))
+
+
+# Function to split the street length of each gender among the districts of a city,
+# None when there are no districts for it
+@st.cache_data(max_entries=MAX_CACHED_CITIES)
+def district_table(city, country):
+    from gender_streets.lengths import district_lengths, load_districts
+
+    districts = load_districts(city)
+    if districts is None:
+        return None
+    return district_lengths(download_streets_and_infer_gender(city, country), districts,
+                            utm=projected_streets(city, country))
+
+
+# Function to get the zoom of the simplified variant drawn at a map zoom, None for the
+# zoom that fits the whole city
+def map_zoom(city, country, zoom=None):
+    from gender_streets.simplify import zoom_bucket
+
+    return zoom_bucket(zoom, download_streets_and_infer_gender(city, country).total_bounds)
+
+
+# Function to get the lighter variant of the streets drawn on the map, once per zoom bucket
+@st.cache_resource(max_entries=MAX_CACHED_MAPS)
+def simplified_streets(city, country, zoom):
+    from gender_streets.simplify import simplify_streets
+
+    streets = download_streets_and_infer_gender(city, country)
+    with stage('simplify'):
+        return simplify_streets(streets, zoom)
+
+
+# Function to build the map layer once per city, language, toggle state and zoom bucket
+@st.cache_resource(max_entries=MAX_CACHED_MAPS)
+def map_layer(city, country, female_only, zoom):
+    from gender_streets.layers import gender_layer
+
+    streets = simplified_streets(city, country, zoom)
+    with stage('map_layer'):
+        return gender_layer(streets, female_only)
+
+
+# Function to compare the cities with local data in a background job shared by all sessions,
+# classifying in the job thread the ones without an artifact; the page polls it until it is
+# done. Cities that would have to be downloaded are left out and returned as missing
+def comparison_table(cities, country, strings):
+    from gender_streets.compare import compare_cities
+    from gender_streets.jobs import RETRY_AFTER
+    from gender_streets.streets import has_local_data
+
+    local = [city for city in cities if has_local_data(city, country)]
+    missing = [city for city in cities if city not in local]
+    key = ('compare', country, tuple(local))
+    # workers=1: no process pool forked from a thread of the Streamlit server
+    job = city_jobs.submit(key, compare_cities, local, country, workers=1)
+    if not job.done:
+        st.progress(job.progress.get('fraction') or 0.0, text=strings['compare_wait'])
+        time.sleep(1)
+        st.rerun()
+    table = job.wait()
+    # Cities that failed are tried again by the next comparison after a while
+    if table.error.notna().any() and time.time() - job.finished > RETRY_AFTER:
+        city_jobs.forget(key)
+    return table, missing
+
+
+# Function to build the spatial index of the map layer, shared read-only by every session
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_MAPS)
+def street_index(city, country, female_only, zoom):
+    from gender_streets.viewport import StreetIndex
+
+    layer = map_layer(city, country, female_only, zoom)
+    with stage('street_index'):
+        return StreetIndex(layer)
+
+
+# Function to build the Folium layer of some streets, colored by gender
+def street_layer(gdf_edges):
+    import folium
+
+    from gender_streets.classifier import GENDER_COLORS
+
+    style_function = lambda feature: {
+        "color": GENDER_COLORS[feature["properties"]["gender"]],
+        "weight": 3,
+    }
+    layer = folium.FeatureGroup(name='streets')
+    if MAP_BACKEND == 'topojson':
+        from gender_streets.topojson import to_topojson
+
+        folium.TopoJson(to_topojson(gdf_edges), 'objects.streets', style_function=style_function,
+                        tooltip=folium.GeoJsonTooltip(fields=["name"], labels=False)).add_to(layer)
+    else:
+        popup = folium.GeoJsonPopup(fields=["name"])
+        folium.GeoJson(gdf_edges[['name', 'gender', 'geometry']], style_function=style_function, popup=popup).add_to(layer)
+    return layer
+
+
+# Function to get the size of the GeoJSON or TopoJSON data of a layer
+def layer_bytes(layer):
+    import json
+
+    return sum(len(json.dumps(child.data).encode()) for child in layer._children.values())
+
+
+# Function to build a Folium map centered on some bounds (minx, miny, maxx, maxy)
+def base_map(bounds, tiles=None, zoom=1, fit_bounds=True):
+    import folium
+
+    minx, miny, maxx, maxy = bounds
+    graph_map = folium.Map(location=((miny + maxy) / 2, (minx + maxx) / 2), zoom_start=zoom, tiles=tiles, width=500, height=500)
+    if fit_bounds:
+        graph_map.fit_bounds([(miny, minx), (maxy, maxx)])
+    return graph_map
+
+
+# Function to plot streets to a Folium map
+def plot_graphto_folium(gdf_edges, graph_map=None, popup_attribute=None, tiles=None, zoom=1, fit_bounds=True, colors=[], edge_width=2, edge_opacity=1):
+    # The bounding box is enough to center the map, no need to union the whole city
+    if graph_map is None:
+        graph_map = base_map(gdf_edges.total_bounds, tiles=tiles, zoom=zoom, fit_bounds=False)
+    street_layer(gdf_edges).add_to(graph_map)
+
+    if fit_bounds:
+        tb = gdf_edges.total_bounds
+        bounds = [(tb[1], tb[0]), (tb[3], tb[2])]
+        graph_map.fit_bounds(bounds)
+    return graph_map
+
+
+# Function to tell whether to show the debug panel, with GENDER_STREETS_DEBUG=1 or ?debug=1
+def debug_enabled():
+    return bool(os.environ.get('GENDER_STREETS_DEBUG')) or st.query_params.get('debug') == '1'
+
+
+# Function to show the stage timings and counters of this run and of the process
+def debug_panel(current):
+    import pandas as pd
+
+    from gender_streets.resources import registry
+
+    with st.expander('Debug', expanded=True):
+        snapshot = metrics.snapshot()
+        col1, col2 = st.columns(2)
+        col1.markdown('**This run**')
+        col1.json({k: v for k, v in current.items() if k not in ('stages', 'counters')})
+        col1.dataframe(pd.Series(current['stages'], name='seconds', dtype=float))
+        col1.json(current['counters'])
+        col2.markdown('**Process**')
+        col2.dataframe(pd.DataFrame(snapshot['stages']).T)
+        col2.json({'counters': snapshot['counters'], 'resources': registry().stats(),
+                   'gender_cache': gender_cache().stats()})
+        st.code(metrics.to_prometheus(), language='text')
+
+
+# Function to render the page with the strings of one language
+def run(strings):
+    with metrics.run('page') as current:
+        render(strings, current)
+    if debug_enabled():
+        debug_panel(current)
+
+
+def render(strings, current):
+
+    if st.button(strings['switch_language']):
+        from streamlit_extras.switch_page_button import switch_page
+
+        switch_page(strings['switch_page'])
+
+    # Initialization of session state variables
+    if 'proceed' not in st.session_state:
+        st.session_state['proceed'] = False
+    if 'map' not in st.session_state:
+        st.session_state['map'] = False
+    if 'compare' not in st.session_state:
+        st.session_state['compare'] = False
+
+    st.title(strings['title'])
+    st.header(strings['header'], divider='rainbow')
+    st.markdown(strings['intro'])
+    st.text("")
+
+    st.markdown(strings['instructions'])
+
+    options = default_cities + ['Other']
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        selected_option = st.selectbox(strings['choose_city'], options)
+        if selected_option == 'Other':
+            # Ask for a free field input
+            city = None
+            st.session_state.proceed = False
+            other_input = st.text_input(strings['specify_city'])
+            if other_input:
+                city = other_input
+                st.session_state.proceed = True
+
+        else:
+            city = selected_option
+
+    with col2:
+        language = st.selectbox(strings['choose_language'], list(strings['languages']))
+        country = strings['languages'][language]
+    current.update(city=city, country=country)
+
+    st.write(strings['ready'])
+
+    with st.expander(strings['how_title']):
+        st.markdown(strings['how'])
+
+    if city != None:
+        streets = get_streets(city, country, strings)
+        if len(streets) < 1:
+            st.session_state.proceed = False
+
+    if st.button(strings['go'], type="primary"):
+        st.session_state.proceed = True
+
+    if st.session_state.proceed:
+        st.subheader(f'{city}')
+        stats = summary_stats(city, country)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric(strings['total'], stats.total)
+        col2.metric(strings['unknown'],
+                    stats.counts['unknown'],
+                    delta=f" {stats.percent('unknown')} %"
+                   )
+        col3.metric(strings['female'],
+                    stats.counts['female'],
+                    delta=f"{stats.percent('female')} %",
+                    delta_color='inverse'
+                   )
+        col4.metric(strings['male'], stats.counts['male'],
+                    delta=f"{stats.percent('male')} %",
+                    delta_color='inverse'
+                   )
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric(strings['length_total'], f"{sum(stats.lengths.values()) / 1000:.0f} km")
+        for col, gender in ((col2, 'unknown'), (col3, 'female'), (col4, 'male')):
+            col.metric(strings[f'length_{gender}'], f"{stats.lengths[gender] / 1000:.0f} km",
+                       delta=f"{stats.length_percent(gender)} %",
+                       delta_color='normal' if gender == 'unknown' else 'inverse'
+                      )
+        st.markdown(strings['ratio'].format(city=city, ratio=stats.ratio))
+        districts = district_table(city, country)
+        if districts is not None:
+            with st.expander(strings['districts_title']):
+                st.markdown(strings['districts'])
+                shown = (districts[['female', 'male']] / 1000).assign(
+                    female_share=districts.female_share * 100, area_km2=districts.area_km2,
+                    female_km_per_km2=districts.female_km_per_km2, male_km_per_km2=districts.male_km_per_km2)
+                st.dataframe(shown.round(2).rename(columns=strings['district_columns']), use_container_width=True)
+        st.download_button(strings['download'], stats.to_json(), file_name=f'{city.lower()}_stats.json', mime='application/json')
+
+        st.subheader('Map')
+
+    else:
+        st.write(strings['start'])
+
+    if st.session_state.proceed:
+
+        if st.button(strings['show_map'], type="primary"):
+            st.session_state.map = True
+
+        if st.session_state.map:
+
+            st.markdown(strings['map_intro'])
+            st.text(" ")
+            st.write(strings['map_speedup'])
+
+            on = st.toggle(strings['female_only'], True)
+
+            from streamlit_folium import st_folium
+            from gender_streets.viewport import folium_bounds
+
+            # The map itself stays the same, only the streets in the last bounds it returned
+            # are sent again when it is panned or zoomed, simplified for the zoom it returned
+            key = f'map_{city}_{country}_{on}'
+            view = st.session_state.get(key) or {}
+            bounds = folium_bounds(view.get('bounds'))
+            index = street_index(city, country, on, map_zoom(city, country, view.get('zoom')))
+            with stage('viewport_query'):
+                streets_mf = index.query(bounds)
+            incr('map_features', len(streets_mf))
+            with stage('folium_layer'):
+                graphmap = base_map(index.bounds, tiles='Cartodb positron')
+                layer = street_layer(streets_mf)
+            if debug_enabled():
+                incr('map_bytes', layer_bytes(layer))
+            with stage('folium_serialize'):
+                st_map = st_folium(graphmap,
+                                   key=key,
+                                   feature_group_to_add=layer,
+                                   use_container_width=True,
+                                   returned_objects=['bounds', 'zoom'])
+    st.subheader(strings['compare_title'])
+    st.markdown(strings['compare'])
+    if st.button(strings['compare_go']):
+        st.session_state.compare = True
+
+    if st.session_state.compare:
+        table, missing = comparison_table(default_cities, country, strings)
+        if missing:
+            st.caption(strings['compare_missing'].format(cities=', '.join(missing)))
+        table = table.dropna(subset='total').set_index('city')
+        shares = table[list(strings['compare_columns'])].rename(columns=strings['compare_columns'])
+        # Side by side bars, cities in the order of the ranking
+        st.bar_chart(shares, stack=False, sort=False)
+        st.dataframe((shares * 100).round(1).assign(**{strings['total']: table.total.astype(int)}),
+                     use_container_width=True)
+
+    if st.session_state.proceed:
+        st.subheader(strings['so_what_title'])
+        st.markdown(strings['so_what'])
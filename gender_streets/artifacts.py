@@ -0,0 +1,109 @@
+# Precomputed per-city artifacts: GeoParquet files with gender, length and merged geometry
+#
+#   python -m gender_streets.artifacts [--country italy] [--model it_core_news_sm] [city ...]
+import argparse
+import json
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+from gender_streets import ARTIFACTS_DIR, DATA_DIR, bundled_cities
+from gender_streets.classifier import GENDERS, classify_names
+from gender_streets.lengths import street_lengths
+from gender_streets.metrics import stage
+from gender_streets.stats import CityStats, city_stats
+
+# Version of what is written to the artifacts and their summaries (columns, how lengths are
+# measured), bump it whenever a change makes the artifacts already built out of date
+ARTIFACT_VERSION = 2
+
+
+# Function to get the artifact path of a city classified for a gender_guesser country
+def artifact_path(city, country):
+    return ARTIFACTS_DIR / f'{city.lower()}_{country}.parquet'
+
+
+# Function to get the JSON summary stored next to the artifact
+def stats_path(city, country):
+    return artifact_path(city, country).with_suffix('.json')
+
+
+# Function to keep only what is read from classified streets: the names, the gender as a
+# categorical, the length in meters and the geometry, on a range index; map colors are
+# derived from the gender
+def compact_streets(streets):
+    if 'length_m' not in streets.columns:
+        streets = streets.assign(length_m=street_lengths(streets))
+    streets = streets[['name', 'gender', 'length_m', 'geometry']].reset_index(drop=True)
+    return streets.astype({'name': 'str', 'gender': pd.CategoricalDtype(GENDERS)})
+
+
+# Function to classify the streets of a city
+def classify_streets(streets, nlp, d, country, cache=None):
+    genders = classify_names(streets.name.astype(str), nlp, d, country=country, cache=cache)
+    streets = streets.assign(gender=pd.Categorical(streets.name.astype(str).map(genders), categories=GENDERS))
+    with stage('sort'):
+        streets = streets.sort_values('gender', ascending=False)
+    return compact_streets(streets)
+
+
+# Function to build the artifact of a city, from its bundled file unless streets are given
+def build_artifact(city, nlp, d, country, cache=None, streets=None):
+    if streets is None:
+        streets = gpd.read_file(DATA_DIR / f'{city.lower()}.geojson')
+    with stage('linemerge'):
+        streets['geometry'] = shapely.line_merge(streets.geometry.values)
+    return write_artifact(city, country, classify_streets(streets, nlp, d, country, cache=cache))
+
+
+# Function to write already classified streets as the artifact of a city, with its summary
+def write_artifact(city, country, streets):
+    path = artifact_path(city, country)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    streets.to_parquet(path, geometry_encoding='WKB', index=False)
+    stats_path(city, country).write_text(city_stats(streets, city, country).to_json())
+    return path
+
+
+# Function to load a prebuilt artifact, None if the city has not been built
+def load_artifact(city, country):
+    path = artifact_path(city, country)
+    if not path.exists():
+        return None
+    with stage('load_artifact'):
+        return compact_streets(gpd.read_parquet(path))
+
+
+# Function to load the summary of a prebuilt artifact, None if the city has not been built
+def load_stats(city, country):
+    path = stats_path(city, country)
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text())
+    return CityStats(**{k: data[k] for k in ('city', 'country', 'total', 'counts', 'lengths')})
+
+
+def main():
+    import gender_guesser.detector as gender
+    import spacy
+
+    from gender_streets.cache import GenderCache
+    from gender_streets.classifier import SPACY_MODELS
+
+    parser = argparse.ArgumentParser(prog='python -m gender_streets.artifacts')
+    parser.add_argument('--country', action='append', help='gender_guesser country (repeatable)')
+    parser.add_argument('--model', help='spaCy model, defaults to the one of each country')
+    parser.add_argument('cities', nargs='*', help='defaults to every data/*.geojson')
+    args = parser.parse_args()
+
+    d = gender.Detector(case_sensitive=False)
+    cache = GenderCache()
+    for country in args.country or list(SPACY_MODELS):
+        nlp = spacy.load(args.model or SPACY_MODELS[country])
+        for city in args.cities or bundled_cities():
+            print(build_artifact(city, nlp, d, country, cache=cache))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# Batch classification of toponym lists too large for memory: national registries, gazetteers
+#
+#   python -m gender_streets.batch names.csv genders.csv [--column name] [--country italy]
+#   python -m gender_streets.batch names.parquet genders.csv --workers 4 --chunk-size 20000
+#   python -m gender_streets.batch names.txt genders.csv --country great_britain --strip none
+#
+# The input (CSV, Parquet or one name per line) is read in chunks, classified across a
+# process pool with a bounded number of chunks in flight and written to a CSV with the
+# name and gender of every input row, in input order. After each chunk the output is
+# flushed and a checkpoint next to it records how far the run got, so running the same
+# command again after an interruption resumes from there instead of starting over.
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import pandas as pd
+
+from gender_streets.classifier import GENDERS, SPACY_MODELS, STRIP_RULES
+from gender_streets.metrics import incr
+
+# Names classified per chunk, the unit of work of the workers and of the checkpoints
+CHUNK_SIZE = 10_000
+
+
+# Function to get the checkpoint path of an output file
+def checkpoint_path(output):
+    return Path(f'{output}.checkpoint.json')
+
+
+# Function to iterate over the names of a CSV, Parquet or text file in chunks of pandas Series
+def iter_name_chunks(source, column='name', chunk_size=CHUNK_SIZE):
+    source = str(source)
+    if source.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size, columns=[column]):
+            yield batch.column(0).to_pandas().fillna('').astype(str)
+    elif source.endswith(('.csv', '.csv.gz', '.tsv', '.tsv.gz')):
+        sep = '\t' if '.tsv' in source else ','
+        with pd.read_csv(source, sep=sep, usecols=[column], dtype=str, keep_default_na=False,
+                         chunksize=chunk_size) as reader:
+            for chunk in reader:
+                yield chunk[column]
+    else:
+        with open(source, encoding='utf-8') as f:
+            while lines := list(islice(f, chunk_size)):
+                yield pd.Series([line.rstrip('\r\n') for line in lines], dtype=object)
+
+
+# Function to skip the first rows of a stream of chunks, returns the remaining chunks
+def skip_rows(chunks, rows):
+    for chunk in chunks:
+        if rows >= len(chunk):
+            rows -= len(chunk)
+            continue
+        yield chunk.iloc[rows:]
+        rows = 0
+
+
+# Function run in the worker: the gender of each name of a chunk, in order
+def classify_chunk(names, country, model, strip=None, cached=True):
+    from gender_streets.build import _worker_resources
+    from gender_streets.classifier import classify_names
+
+    nlp, d, cache = _worker_resources(model)
+    genders = classify_names(names, nlp, d, country, cache=cache if cached else None, strip=strip)
+    return pd.Series(names, dtype=object).map(genders).fillna('unknown').tolist()
+
+
+def load_checkpoint(output):
+    path = checkpoint_path(output)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_checkpoint(output, checkpoint):
+    path = checkpoint_path(output)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(checkpoint, indent=2, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+# Function to classify every name of a file into an output CSV, resuming from its checkpoint
+# unless restart is set; progress(checkpoint) is called after each chunk; workers=1 runs
+# everything in this process. Returns the final checkpoint, with counts and throughput
+def classify_file(source, output, country='italy', column='name', model=None, strip=None, workers=None,
+                  chunk_size=CHUNK_SIZE, cached=True, restart=False, progress=None):
+    model = model or SPACY_MODELS[country]
+    strip = strip or STRIP_RULES.get(country, 'prefix')
+    options = {'source': str(Path(source).resolve()), 'column': column, 'country': country, 'model': model,
+               'strip': strip}
+    checkpoint = None if restart else load_checkpoint(output)
+    if checkpoint is not None and any(checkpoint.get(k) != v for k, v in options.items()):
+        raise ValueError(f'{checkpoint_path(output)} belongs to a run with other options, '
+                         f'delete it or restart the run')
+    if checkpoint is None:
+        checkpoint = {**options, 'rows': 0, 'bytes': 0, 'seconds': 0.0,
+                      'counts': dict.fromkeys(GENDERS, 0), 'done': False}
+    if checkpoint['done']:
+        return checkpoint
+
+    chunks = skip_rows(iter_name_chunks(source, column, chunk_size), checkpoint['rows'])
+    start, resumed_seconds = time.perf_counter(), checkpoint['seconds']
+    with open(output, 'a+b') as f:
+        # Rows written after the last checkpoint are written again
+        f.truncate(checkpoint['bytes'])
+
+        def write(names, genders):
+            frame = pd.DataFrame({'name': names.values, 'gender': genders})
+            f.write(frame.to_csv(header=checkpoint['bytes'] == 0, index=False).encode())
+            f.flush()
+            os.fsync(f.fileno())
+            counts = frame.gender.value_counts()
+            incr('names_batch', len(frame))
+            checkpoint.update(rows=checkpoint['rows'] + len(frame), bytes=f.tell(),
+                              seconds=round(resumed_seconds + time.perf_counter() - start, 3),
+                              counts={g: checkpoint['counts'][g] + int(counts.get(g, 0)) for g in GENDERS})
+            save_checkpoint(output, checkpoint)
+            if progress is not None:
+                progress(checkpoint)
+
+        if workers == 1:
+            for names in chunks:
+                write(names, classify_chunk(names.tolist(), country, model, strip, cached))
+        else:
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Twice as many chunks in flight as workers keeps them busy and memory flat
+                in_flight, pending = 2 * workers, deque()
+                for names in chunks:
+                    pending.append((names, pool.submit(classify_chunk, names.tolist(), country, model, strip, cached)))
+                    if len(pending) >= in_flight:
+                        names, future = pending.popleft()
+                        write(names, future.result())
+                while pending:
+                    names, future = pending.popleft()
+                    write(names, future.result())
+
+    checkpoint['done'] = True
+    save_checkpoint(output, checkpoint)
+    return checkpoint
+
+
+# Function to format the progress of a run
+def describe(checkpoint):
+    rate = checkpoint['rows'] / checkpoint['seconds'] if checkpoint['seconds'] else 0.0
+    counts = ', '.join(f'{checkpoint["counts"][g]} {g}' for g in GENDERS)
+    return f"{checkpoint['rows']} names in {checkpoint['seconds']:.1f}s ({rate:.0f} names/s): {counts}"
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m gender_streets.batch')
+    parser.add_argument('source', help='CSV, TSV or Parquet file with a name column, or a text file with one name per line')
+    parser.add_argument('output', help='CSV file with the name and gender of every input row')
+    parser.add_argument('--column', default='name', help='name column of a CSV or Parquet input')
+    parser.add_argument('--country', default='italy', choices=list(SPACY_MODELS), help='gender_guesser country')
+    parser.add_argument('--model', help='spaCy model, defaults to the one of the country')
+    parser.add_argument('--strip', choices=['prefix', 'suffix', 'none'],
+                        help="token holding the toponym type, defaults to the country's rule")
+    parser.add_argument('--workers', type=int, help='worker processes, 1 to run in this process')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--no-cache', action='store_true', help='do not read or fill the gender cache')
+    parser.add_argument('--restart', action='store_true', help='ignore the checkpoint and start over')
+    args = parser.parse_args()
+
+    checkpoint = load_checkpoint(args.output)
+    if checkpoint is not None and not args.restart and not checkpoint['done']:
+        print(f"Resuming after {checkpoint['rows']} names", file=sys.stderr)
+    checkpoint = classify_file(args.source, args.output, country=args.country, column=args.column, model=args.model,
+                               strip=args.strip, workers=args.workers, chunk_size=args.chunk_size,
+                               cached=not args.no_cache, restart=args.restart,
+                               progress=lambda c: print(describe(c), file=sys.stderr))
+    print(describe(checkpoint))
+
+
+if __name__ == '__main__':
+    main()
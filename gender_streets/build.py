@@ -0,0 +1,187 @@
+# Offline build of the per-city artifacts across a process pool
+#
+#   python -m gender_streets.build [--country italy] [--workers 4] [--offline] [--force] [city ...]
+#
+# Cities with a data/{city}.geojson file are read from disk, the others come from the
+# local graph store or are downloaded from OpenStreetMap. A manifest with timings and
+# counts is written next to the artifacts and cities whose input (bundled file or stored
+# ways) and model did not change since the last build are skipped.
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from gender_streets import DEFAULT_CITIES, bundled_cities
+from gender_streets.artifacts import ARTIFACT_VERSION, ARTIFACTS_DIR, artifact_path
+from gender_streets.classifier import CLASSIFIER_VERSION, SPACY_MODELS
+from gender_streets.graphstore import edges_path
+from gender_streets.metrics import log_runs, metrics
+from gender_streets.streets import disk_path
+
+MANIFEST_PATH = ARTIFACTS_DIR / 'manifest.json'
+
+# Artifacts built by another version of the classification rules or of the artifact layout are stale
+PIPELINE_VERSION = f'classifier-{CLASSIFIER_VERSION}/artifact-{ARTIFACT_VERSION}'
+
+
+# Function to fingerprint the input of a city: its bundled file, or its ways in the graph
+# store, which a diff refresh rewrites; None when there is neither
+def input_hash(city):
+    path = disk_path(city) if disk_path(city).exists() else edges_path(city)
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+# Function to tell whether the artifact of a city is already up to date
+def is_fresh(entry, city, country, model):
+    if entry is None or entry.get('error') or not artifact_path(city, country).exists():
+        return False
+    if entry.get('model') != model or entry.get('pipeline') != PIPELINE_VERSION:
+        return False
+    current = input_hash(city)
+    # Downloaded cities whose ways are no longer stored are only rebuilt on --force
+    if current is None and entry.get('source') in ('osm', 'store'):
+        return True
+    return entry.get('input_hash') == current
+
+
+# Function to record an artifact rewritten outside of a build, as by a diff refresh, in the
+# manifest entry of the city when it has one
+def update_entry(city, country, streets, counts):
+    manifest = load_manifest()
+    entry = manifest.get(f'{city.lower()}_{country}')
+    if entry is None:
+        return
+    entry.update(input_hash=input_hash(city), streets=streets, counts=counts, built_at=time.time())
+    save_manifest(manifest)
+
+
+def _worker_resources(model):
+    from gender_streets.cache import GenderCache
+    from gender_streets.resources import registry
+
+    # The registry loads each model once per worker process
+    resources = registry()
+    return resources.nlp(model), resources.detector(), GenderCache()
+
+
+# Function to load the streets of a city from disk, the graph store or OpenStreetMap
+def load_city(city):
+    from gender_streets.graphstore import load_streets
+    from gender_streets.streets import download_from_osm, load_from_disk
+
+    if disk_path(city).exists():
+        return 'disk', load_from_disk(city)
+    streets = load_streets(city)
+    if streets is not None:
+        return 'store', streets
+    return 'osm', download_from_osm(city)
+
+
+# Function run in the worker: load or download, classify and serialize one city,
+# with the time spent in each stage of the pipeline
+def build_city(city, country, model):
+    with metrics.run('build', city=city, country=country) as run:
+        entry = _build_city(city, country, model)
+    return {**entry, 'stages': run['stages']}
+
+
+def _build_city(city, country, model):
+    from gender_streets.artifacts import build_artifact, load_stats
+    from gender_streets.cache import model_version
+
+    timings = {}
+    start = time.perf_counter()
+    nlp, d, cache = _worker_resources(model)
+    timings['model'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    source, streets = load_city(city)
+    timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    path = build_artifact(city, nlp, d, country, cache=cache, streets=streets)
+    timings['classify'] = time.perf_counter() - start
+
+    return {'city': city, 'country': country, 'model': model, 'model_version': model_version(nlp),
+            'pipeline': PIPELINE_VERSION,
+            'source': source, 'input_hash': input_hash(city), 'artifact': path.name,
+            'streets': len(streets), 'counts': load_stats(city, country).counts,
+            'timings': {k: round(v, 3) for k, v in timings.items()}, 'built_at': time.time()}
+
+
+# Function to build every (city, country) pair, skipping the ones already up to date;
+# workers=1 builds them one after the other in this process
+def build(cities, countries, workers=None, force=False, offline=False, model=None):
+    manifest = load_manifest()
+    jobs = []
+    for country in countries:
+        for city in cities:
+            key = f'{city.lower()}_{country}'
+            city_model = model or SPACY_MODELS[country]
+            if offline and not disk_path(city).exists():
+                print(f'{key}: no local data, skipped (offline)')
+            elif not force and is_fresh(manifest.get(key), city, country, city_model):
+                print(f'{key}: up to date')
+            else:
+                jobs.append((key, city, country, city_model))
+
+    def record(key, city, country, city_model, result):
+        try:
+            manifest[key] = result()
+            print(f"{key}: {manifest[key]['streets']} streets in {sum(manifest[key]['timings'].values()):.1f}s")
+        except Exception as e:
+            manifest[key] = {'city': city, 'country': country, 'model': city_model, 'error': repr(e)}
+            print(f'{key}: failed, {e!r}')
+        # Saved after every city so an interrupted build can resume
+        save_manifest(manifest)
+
+    if workers == 1:
+        for key, city, country, city_model in jobs:
+            record(key, city, country, city_model, lambda: build_city(city, country, city_model))
+        return manifest
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_city, city, country, city_model): (key, city, country, city_model)
+                   for key, city, country, city_model in jobs}
+        for future in as_completed(futures):
+            record(*futures[future], future.result)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m gender_streets.build')
+    parser.add_argument('--country', action='append', help='gender_guesser country (repeatable)')
+    parser.add_argument('--model', help='spaCy model, defaults to the one of each country')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the CPU count')
+    parser.add_argument('--force', action='store_true', help='rebuild cities that are up to date')
+    parser.add_argument('--offline', action='store_true', help='only build cities with a data/*.geojson file')
+    parser.add_argument('cities', nargs='*', help='defaults to the app cities plus every data/*.geojson')
+    parser.add_argument('--log', action='store_true', help='log the stage timings of every city')
+    args = parser.parse_args()
+
+    if args.log:
+        log_runs()
+    cities = args.cities or DEFAULT_CITIES + [c.title() for c in bundled_cities()
+                                              if c not in [x.lower() for x in DEFAULT_CITIES]]
+    build(cities, args.country or list(SPACY_MODELS), workers=args.workers, force=args.force,
+          offline=args.offline, model=args.model)
+
+
+if __name__ == '__main__':
+    main()
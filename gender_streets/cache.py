@@ -0,0 +1,129 @@
+# Persistent name -> gender store shared by every city, language and process
+#
+#   python -m gender_streets.cache warm [--country italy] [--model it_core_news_sm]
+import argparse
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from gender_streets import CACHE_DIR
+
+# SQLite default limit on bound parameters is 999 on older builds
+CHUNK_SIZE = 400
+
+
+# Function to normalize a street name before using it as a cache key
+def normalize_name(name):
+    return ' '.join(str(name).split())
+
+
+# Function to identify the spaCy model a result was computed with
+def model_version(nlp):
+    return f"{nlp.meta.get('lang', '')}_{nlp.meta.get('name', '')}-{nlp.meta.get('version', '')}"
+
+
+class GenderCache:
+    def __init__(self, path=None, max_entries=500_000):
+        self.path = CACHE_DIR / 'genders.sqlite' if path is None else path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as con, con:
+            con.execute("""CREATE TABLE IF NOT EXISTS genders (
+                               name TEXT, country TEXT, model TEXT, gender TEXT, last_used REAL,
+                               PRIMARY KEY (name, country, model)) WITHOUT ROWID""")
+            con.execute("CREATE INDEX IF NOT EXISTS genders_last_used ON genders (last_used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # Look up many names at once, returns {name: gender} for the ones already known
+    def get_many(self, names, country, model):
+        keys = {normalize_name(n): n for n in names}
+        found = {}
+        with self._lock, closing(self._connect()) as con, con:
+            key_list = list(keys)
+            for i in range(0, len(key_list), CHUNK_SIZE):
+                chunk = key_list[i:i + CHUNK_SIZE]
+                rows = con.execute(
+                    f"SELECT name, gender FROM genders WHERE country = ? AND model = ? "
+                    f"AND name IN ({', '.join('?' * len(chunk))})", [country, model, *chunk])
+                found.update(rows)
+            now = time.time()
+            con.executemany("UPDATE genders SET last_used = ? WHERE name = ? AND country = ? AND model = ?",
+                            [(now, k, country, model) for k in found])
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return {n: found[k] for k, n in keys.items() if k in found}
+
+    # Bulk-write a batch of {name: gender} results, evicting the least recently used entries
+    def put_many(self, genders, country, model):
+        now = time.time()
+        rows = [(normalize_name(n), country, model, g, now) for n, g in dict(genders).items()]
+        with self._lock, closing(self._connect()) as con, con:
+            con.executemany("INSERT OR REPLACE INTO genders VALUES (?, ?, ?, ?, ?)", rows)
+            excess = con.execute("SELECT COUNT(*) FROM genders").fetchone()[0] - self.max_entries
+            if excess > 0:
+                con.execute("""DELETE FROM genders WHERE (name, country, model) IN (
+                                   SELECT name, country, model FROM genders ORDER BY last_used LIMIT ?)""", [excess])
+
+    def __len__(self):
+        with closing(self._connect()) as con:
+            return con.execute("SELECT COUNT(*) FROM genders").fetchone()[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self), 'max_entries': self.max_entries}
+
+    def clear(self):
+        with self._lock, closing(self._connect()) as con, con:
+            con.execute("DELETE FROM genders")
+        self.hits = self.misses = 0
+
+
+# Function to pre-populate the cache with the names of every bundled city
+def warm(countries, model=None, cache=None):
+    import geopandas as gpd
+    import gender_guesser.detector as gender
+    import spacy
+
+    from gender_streets import DATA_DIR, bundled_cities
+    from gender_streets.classifier import SPACY_MODELS, classify_names
+
+    cache = GenderCache() if cache is None else cache
+    d = gender.Detector(case_sensitive=False)
+    names = set()
+    for city in bundled_cities():
+        names.update(gpd.read_file(DATA_DIR / f'{city}.geojson').name.astype(str).unique())
+    for country in countries:
+        nlp = spacy.load(model or SPACY_MODELS[country])
+        classify_names(sorted(names), nlp, d, country, cache=cache)
+        print(f'{country}: {len(names)} names, {cache.stats()}')
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m gender_streets.cache')
+    sub = parser.add_subparsers(dest='command', required=True)
+    warm_parser = sub.add_parser('warm', help='classify all data/*.geojson names into the cache')
+    warm_parser.add_argument('--country', action='append', help='gender_guesser country (repeatable)')
+    warm_parser.add_argument('--model', help='spaCy model, defaults to the one of each country')
+    sub.add_parser('stats', help='print the cache size')
+    sub.add_parser('clear', help='drop every cached entry')
+    args = parser.parse_args()
+
+    if args.command == 'warm':
+        from gender_streets.classifier import SPACY_MODELS
+        warm(args.country or list(SPACY_MODELS), model=args.model)
+    elif args.command == 'stats':
+        print(GenderCache().stats())
+    elif args.command == 'clear':
+        GenderCache().clear()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# Gender classification of street names, shared by the language pages
+import pandas as pd
+
+from gender_streets.cache import model_version
+from gender_streets.metrics import incr, stage
+from gender_streets.prefilter import prefilter
+
+# spaCy model used for each gender_guesser country
+SPACY_MODELS = {'italy': 'it_core_news_sm', 'france': 'fr_core_news_sm', 'great_britain': 'en_core_web_sm'}
+
+# Version of the classification rules (stripping, pre-filter, person labels), stored in the
+# gender cache key next to the model: bump it whenever a change can classify a name differently
+CLASSIFIER_VERSION = 3
+
+# Genders a street can be classified as
+GENDERS = ['female', 'male', 'unknown']
+
+# Map color of each gender
+GENDER_COLORS = {'male': '#32E3A1', 'female': 'violet', 'unknown': '#D3D3D3'}
+
+# Entity labels of people: 'PER' in the Italian and French models, 'PERSON' in the English one
+PERSON_LABELS = ('PER', 'PERSON')
+
+# Pipeline components that do not feed the NER step and can be skipped
+UNUSED_PIPES = ('tagger', 'morphologizer', 'parser', 'senter', 'attribute_ruler', 'lemmatizer')
+
+# Where the street type is in the names of each country: 'prefix' drops the first token
+# ("Via Roma"), 'suffix' the last one ("Baker Street") and 'none' keeps every token
+STRIP_RULES = {'italy': 'prefix', 'france': 'prefix', 'great_britain': 'suffix'}
+
+
+# Function to strip the street type ("Via", "Piazza", "Street", ...) from a name,
+# with the rule of the country unless another one is given
+def strip_names(names, country, rule=None):
+    tokens = pd.Series(names, dtype=object).astype(str).str.split()
+    rule = rule or STRIP_RULES.get(country, 'prefix')
+    if rule == 'suffix':
+        return tokens.str[:-1]
+    if rule == 'none':
+        return tokens
+    return tokens.str[1:]
+
+
+# Function to get the first male/female guess among the tokens of a name
+def guess_gender(texts, d, country):
+    res = [d.get_gender(t, country=country) for t in texts]
+    res = [g for g in res if g in ['male', 'female']]
+    return res[0] if len(res) > 0 else 'unknown'
+
+
+# Lookup tables of the male/female names of each country, built once per process
+_LOOKUPS = {}
+
+
+# Function to precompile gender_guesser's dictionary into a name -> gender Series for one country
+def gender_lookup(d, country):
+    key = (country, d.case_sensitive)
+    if key not in _LOOKUPS:
+        genders = {name: d.get_gender(name, country=country) for name in d.names}
+        lookup = pd.Series(genders, dtype=object)
+        _LOOKUPS[key] = lookup[lookup.isin(['male', 'female'])]
+    return _LOOKUPS[key]
+
+
+# Same tables as plain dicts, for the per-token lookups of guess_genders
+_LOOKUP_DICTS = {}
+
+
+# Function to get the first male/female guess of many token lists with dict lookups
+def guess_genders(tokens, d, country):
+    key = (country, d.case_sensitive)
+    if key not in _LOOKUP_DICTS:
+        _LOOKUP_DICTS[key] = gender_lookup(d, country).to_dict()
+    genders = _LOOKUP_DICTS[key]
+    fold = str if d.case_sensitive else lambda t: str(t).lower()
+    guesses = [next((genders[t] for t in map(fold, texts) if t in genders), 'unknown') for texts in tokens]
+    return pd.Series(guesses, index=tokens.index, dtype=object)
+
+
+# Function to get gender of a name, one pipeline call per name (reference path)
+def get_gender(texts, nlp, d, country):
+    doc = nlp(' '.join(texts))
+    if any(e.label_ in PERSON_LABELS for e in doc.ents):
+        return guess_gender(texts, d, country)
+    else:
+        return 'unknown'
+
+
+# Function to list the components that can be skipped when running NER only
+def unused_pipes(nlp):
+    return [p for p in nlp.pipe_names if p in UNUSED_PIPES]
+
+
+# Function to classify many street names at once, streaming them through nlp.pipe;
+# names stripped with another rule than the one of the country bypass the cache
+def classify_names(names, nlp, d, country, batch_size=256, n_process=1, cache=None, strip=None):
+    names = pd.Series(pd.unique(pd.Series(names, dtype=object).astype(str)), dtype=object)
+    if strip not in (None, STRIP_RULES.get(country, 'prefix')):
+        cache = None
+    if cache is None:
+        return _classify(names, nlp, d, country, batch_size, n_process, strip)
+
+    model = f'{model_version(nlp)}/v{CLASSIFIER_VERSION}'
+    with stage('cache_lookup'):
+        known = pd.Series(cache.get_many(names, country, model), dtype=object)
+    incr('cache_hits', len(known))
+    incr('cache_misses', len(names) - len(known))
+    fresh = _classify(names[~names.isin(known.index)].reset_index(drop=True), nlp, d, country, batch_size, n_process,
+                      strip)
+    with stage('cache_store'):
+        cache.put_many(fresh, country, model)
+    gender = pd.concat([known, fresh]).reindex(names.values)
+    gender.index.name = 'name'
+    return gender.rename('gender')
+
+
+def _classify(names, nlp, d, country, batch_size, n_process, strip=None):
+    tokens = strip_names(names, country, strip)
+    # Only names that may contain a person go through the model
+    plausible = prefilter(names, tokens, gender_lookup(d, country), country, d.case_sensitive).isna()
+    incr('names_classified', len(names))
+    incr('names_ner', int(plausible.sum()))
+    with stage('ner'):
+        docs = nlp.pipe(tokens[plausible].str.join(' '), batch_size=batch_size, n_process=n_process, disable=unused_pipes(nlp))
+        has_person = pd.Series(False, index=names.index, dtype=bool)
+        has_person[plausible] = pd.array([any(e.label_ in PERSON_LABELS for e in doc.ents) for doc in docs], dtype=bool)
+
+    gender = pd.Series('unknown', index=names.index, dtype=object)
+    with stage('gender_lookup'):
+        gender[has_person] = guess_genders(tokens[has_person], d, country)
+    gender.index = names.values
+    gender.index.name = 'name'
+    return gender.rename('gender')
@@ -0,0 +1,105 @@
+# Side by side comparison of many cities, ranked by the share of streets named after women
+#
+#   python -m gender_streets.compare [--country italy] [--workers 4] [--json] [city ...]
+#
+# Cities with a prebuilt artifact are read from its JSON summary, the others are loaded
+# and classified across a process pool, sharing the persistent name -> gender cache.
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from gender_streets import DEFAULT_CITIES
+from gender_streets.artifacts import load_stats
+from gender_streets.build import _worker_resources, load_city
+from gender_streets.classifier import SPACY_MODELS
+from gender_streets.metrics import metrics
+from gender_streets.stats import city_stats
+
+COLUMNS = ['city', 'total', 'female', 'male', 'unknown', 'female_share', 'male_share',
+           'female_length_share', 'male_length_share', 'source', 'seconds', 'error']
+
+
+# Function run in the worker: load and classify one city, without writing its artifact
+def classify_city(city, country, model, cached=True):
+    from gender_streets.artifacts import classify_streets
+
+    start = time.perf_counter()
+    with metrics.run('compare', city=city, country=country):
+        nlp, d, cache = _worker_resources(model)
+        source, streets = load_city(city)
+        streets = classify_streets(streets, nlp, d, country, cache=cache if cached else None)
+    return city_stats(streets, city, country), source, time.perf_counter() - start
+
+
+# Function to turn the statistics of a city into a row of the comparison table
+def comparison_row(stats, source, seconds):
+    total = stats.total or float('nan')
+    return {'city': stats.city, 'total': stats.total,
+            **{g: stats.counts[g] for g in ('female', 'male', 'unknown')},
+            'female_share': stats.counts['female'] / total, 'male_share': stats.counts['male'] / total,
+            'female_length_share': stats.length_share('female'), 'male_length_share': stats.length_share('male'),
+            'source': source, 'seconds': round(seconds, 3), 'error': None}
+
+
+# Function to compare cities, classifying the ones without an artifact in parallel:
+# workers=1 runs everything in this process, use_artifacts=False and cached=False
+# force a classification from scratch; progress(info) is called after each city
+def compare_cities(cities, country, workers=None, model=None, use_artifacts=True, cached=True, progress=None):
+    model = model or SPACY_MODELS[country]
+    rows, pending = [], []
+
+    def add(row):
+        rows.append(row)
+        if progress is not None:
+            progress({'done': len(rows), 'total': len(cities), 'fraction': len(rows) / len(cities)})
+
+    for city in cities:
+        start = time.perf_counter()
+        stats = load_stats(city, country) if use_artifacts else None
+        if stats is not None:
+            add(comparison_row(stats, 'artifact', time.perf_counter() - start))
+        else:
+            pending.append(city)
+
+    if workers == 1:
+        for city in pending:
+            try:
+                add(comparison_row(*classify_city(city, country, model, cached)))
+            except Exception as e:
+                add({'city': city, 'error': repr(e)})
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(classify_city, city, country, model, cached): city for city in pending}
+            for future in as_completed(futures):
+                try:
+                    add(comparison_row(*future.result()))
+                except Exception as e:
+                    add({'city': futures[future], 'error': repr(e)})
+
+    table = pd.DataFrame(rows, columns=COLUMNS)
+    return table.sort_values(['female_share', 'female_length_share'], ascending=False,
+                             na_position='last', ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m gender_streets.compare')
+    parser.add_argument('--country', default='italy', help='gender_guesser country')
+    parser.add_argument('--model', help='spaCy model, defaults to the one of the country')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the CPU count')
+    parser.add_argument('--json', action='store_true', help='print the table as JSON records')
+    parser.add_argument('cities', nargs='*', help='defaults to the app cities')
+    args = parser.parse_args()
+
+    table = compare_cities(args.cities or DEFAULT_CITIES, args.country, workers=args.workers, model=args.model)
+    if args.json:
+        print(table.to_json(orient='records', force_ascii=False, indent=2))
+    else:
+        print(table.drop(columns='error').to_string(float_format='{:.3f}'.format))
+        for city, error in table.dropna(subset='error')[['city', 'error']].values:
+            print(f'{city}: failed, {error}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+# Incremental refresh of downloaded cities from OSM change files
+#
+#   python -m gender_streets.diffs Collegno changes.osc [--country italy] [--model it_core_news_sm]
+#   python -m gender_streets.diffs Collegno http://localhost:8765/diffs/collegno.osc
+#
+# The graph store keeps the id and version of every named way of a downloaded city.
+# An osmChange file (local .osc or served over HTTP, optionally gzipped) is applied
+# to those ways, only the street names it touches are merged again, and only the
+# names that were not in the city before go through the gender classifier.
+#
+# Ways must carry their geometry, either as nodes in the same file or as lat/lon on
+# their nd elements (augmented diffs). Moving a node without its way is not applied.
+import argparse
+import gzip
+import xml.etree.ElementTree as ET
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+from gender_streets.graphstore import load_edges, load_streets, save_ways
+from gender_streets.ingest import merge_chunks
+from gender_streets.metrics import incr, stage
+
+ACTIONS = ('create', 'modify', 'delete')
+
+
+# Function to iterate over the way changes of an osmChange stream as
+# (action, osm_id, version, name, coordinates), name and coordinates are None
+# when the way is deleted or is no longer a named highway; like ingest.iter_ways,
+# parsed elements are cleared so the tree does not grow with the file
+def iter_changes(stream):
+    nodes = {}
+    block = None
+    events = ET.iterparse(stream, events=('start', 'end'))
+    _, root = next(events)
+    for event, elem in events:
+        if elem.tag in ACTIONS:
+            block = elem if event == 'start' else None
+            if event == 'end':
+                root.clear()
+            continue
+        if event != 'end' or block is None:
+            continue
+        action = block.tag
+        if elem.tag == 'node':
+            if action != 'delete' and elem.get('lat'):
+                nodes[elem.get('id')] = (float(elem.get('lon')), float(elem.get('lat')))
+            block.clear()
+        elif elem.tag == 'relation':
+            block.clear()
+        elif elem.tag == 'way':
+            tags = {t.get('k'): t.get('v') for t in elem.iter('tag')}
+            name, coords = None, None
+            if action != 'delete' and 'highway' in tags and tags.get('name'):
+                name = tags['name']
+                coords = [(float(nd.get('lon')), float(nd.get('lat'))) if nd.get('lat') else nodes.get(nd.get('ref'))
+                          for nd in elem.iter('nd')]
+                coords = [c for c in coords if c is not None]
+                if len(coords) < 2:
+                    name, coords = None, None
+            block.clear()
+            yield action, int(elem.get('id')), int(elem.get('version') or 0), name, coords
+
+
+# Function to open a change file: a local path or an HTTP URL, gzipped or not
+def open_changes(source, timeout=600):
+    source = str(source)
+    if source.startswith(('http://', 'https://')):
+        import requests
+
+        response = requests.get(source, stream=True, timeout=timeout)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        stream = response.raw
+    else:
+        stream = open(source, 'rb')
+    return gzip.GzipFile(fileobj=stream) if source.endswith('.gz') else stream
+
+
+# Function to apply way changes to the stored ways of a city, returns the new ways,
+# the street names whose geometry changed and the number of ways per action
+def apply_changes(ways, changes):
+    ways = ways.set_index('osm_id', drop=False)
+    versions = ways.version.to_dict()
+    affected, upserts, skipped = set(), {}, 0
+    for action, osm_id, version, name, coords in changes:
+        # Changes already applied, or older than the download, are ignored
+        if version and version <= versions.get(osm_id, -1):
+            skipped += 1
+            continue
+        versions[osm_id] = version
+        if osm_id in ways.index:
+            affected.add(ways.at[osm_id, 'name'])
+        if name is not None:
+            affected.add(name)
+        upserts[osm_id] = (version, name, coords)
+
+    added = [(i, v, n, c) for i, (v, n, c) in upserts.items() if n is not None]
+    counts = {'created': sum(i not in ways.index for i, *_ in added),
+              'modified': sum(i in ways.index for i, *_ in added),
+              'deleted': sum(n is None and i in ways.index for i, (_, n, _) in upserts.items()),
+              'skipped': skipped}
+    kept = ways.drop(index=[i for i in upserts if i in ways.index])
+    if added:
+        ids, new_versions, names, coords = zip(*added)
+        frame = gpd.GeoDataFrame({'osm_id': list(ids), 'version': list(new_versions), 'name': list(names)},
+                                 geometry=[shapely.linestrings(c) for c in coords], crs=ways.crs)
+        kept = pd.concat([kept, frame])
+    return kept.reset_index(drop=True), affected, counts
+
+
+# Function to refresh a downloaded city from a change file, classifying only the names it
+# did not have before (the others are found in the gender cache); the artifact of the city,
+# when it has one, and its manifest entry are rewritten too. Returns the updated streets,
+# with their gender, and a report of what changed
+def refresh_city(city, source, nlp, d, country, cache=None):
+    from gender_streets.artifacts import artifact_path, classify_streets, load_stats, write_artifact
+    from gender_streets.build import update_entry
+    from gender_streets.cache import GenderCache
+
+    ways = load_edges(city)
+    if ways is None or 'version' not in ways.columns:
+        raise ValueError(f'{city} has no stored OSM way versions, download it before refreshing it')
+    streets = load_streets(city)
+    before = set(streets.name)
+
+    with stage('diff_apply'):
+        with open_changes(source) as stream:
+            ways, affected, counts = apply_changes(ways, iter_changes(stream))
+
+    # Only the streets sharing a name with a changed way are merged again
+    with stage('linemerge'):
+        touched = ways[ways.name.isin(affected)]
+        merged = merge_chunks([touched]) if len(touched) else streets.iloc[:0]
+        streets = pd.concat([streets[~streets.name.isin(affected)], merged], ignore_index=True)
+        streets = streets.sort_values('name', ignore_index=True)
+    save_ways(city, ways, streets)
+
+    cache = cache if cache is not None else GenderCache()
+    misses = cache.misses
+    streets = classify_streets(streets, nlp, d, country, cache=cache)
+    report = {'city': city, 'ways': counts, 'names': len(streets), 'remerged': len(merged),
+              'new_names': len(set(streets.name) - before), 'removed_names': len(before - set(streets.name)),
+              'reclassified': cache.misses - misses}
+    incr('names_reclassified', report['reclassified'])
+    if artifact_path(city, country).exists():
+        with stage('artifact'):
+            write_artifact(city, country, streets)
+        update_entry(city, country, len(streets), load_stats(city, country).counts)
+        report['artifact'] = True
+    return streets, report
+
+
+def main():
+    from gender_streets.classifier import SPACY_MODELS
+    from gender_streets.resources import registry
+
+    parser = argparse.ArgumentParser(prog='python -m gender_streets.diffs')
+    parser.add_argument('--country', default='italy', help='gender_guesser country')
+    parser.add_argument('--model', help='spaCy model, defaults to the one of the country')
+    parser.add_argument('city')
+    parser.add_argument('changes', help='osmChange file or URL')
+    args = parser.parse_args()
+
+    resources = registry()
+    nlp = resources.nlp(args.model or SPACY_MODELS[args.country])
+    _, report = refresh_city(args.city, args.changes, nlp, resources.detector(), args.country)
+    w = report['ways']
+    print(f"{args.city}: {w['created']} ways created, {w['modified']} modified, {w['deleted']} deleted, "
+          f"{w['skipped']} already applied; {report['remerged']} streets merged again, "
+          f"{report['reclassified']} of {report['names']} names reclassified "
+          f"({report['reclassified'] / max(report['names'], 1):.1%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+# Local store of street graphs, so that known cities are not downloaded again
+#
+#   python -m gender_streets.graphstore convert data/collegno.graphml
+#
+# Graphs are kept as GeoParquet node and edge tables under the cache directory. The
+# bundled data/*.graphml dumps are converted on first use, since parsing their XML
+# is an order of magnitude slower than reading the tables back. Downloaded cities
+# are stored as their named ways, with OSM ids and versions so that they can be
+# updated from change files (see gender_streets.diffs), next to the merged streets.
+import argparse
+import time
+from pathlib import Path
+
+import geopandas as gpd
+
+from gender_streets import CACHE_DIR, DATA_DIR
+from gender_streets.ingest import merge_chunks
+
+GRAPHS_DIR = CACHE_DIR / 'graphs'
+
+# Edge attributes kept in the tables, list values (merged OSM ways) are joined
+EDGE_COLUMNS = ['osmid', 'name', 'highway', 'length']
+
+# Load and parse timings of the last calls, per city
+timings = {}
+
+
+# Function to join the list values osmnx leaves on simplified edges
+def _flatten(x):
+    return ', '.join(map(str, x)) if isinstance(x, list) else x
+
+
+def edges_path(city):
+    return GRAPHS_DIR / f'{city.lower()}.edges.parquet'
+
+
+def streets_path(city):
+    return GRAPHS_DIR / f'{city.lower()}.streets.parquet'
+
+
+def nodes_path(city):
+    return GRAPHS_DIR / f'{city.lower()}.nodes.parquet'
+
+
+def graphml_path(city):
+    return DATA_DIR / f'{city.lower()}.graphml'
+
+
+# Function to convert a GraphML dump into node and edge tables, returns the edges
+def convert_graphml(path, city=None):
+    import osmnx as ox
+
+    path = Path(path)
+    city = city or path.stem
+    start = time.perf_counter()
+    graph = ox.load_graphml(path)
+    nodes, edges = ox.graph_to_gdfs(graph)
+    parsed = time.perf_counter() - start
+
+    edges = edges[[c for c in EDGE_COLUMNS if c in edges.columns] + ['geometry']].reset_index()
+    for column in ('osmid', 'name', 'highway'):
+        if column in edges.columns:
+            edges[column] = edges[column].map(_flatten).astype('string')
+    nodes = nodes[['x', 'y', 'geometry']].reset_index()
+
+    GRAPHS_DIR.mkdir(parents=True, exist_ok=True)
+    edges.to_parquet(edges_path(city), index=False)
+    nodes.to_parquet(nodes_path(city), index=False)
+    streets_path(city).unlink(missing_ok=True)
+    timings[city.lower()] = {'graphml_parse': parsed, 'convert': time.perf_counter() - start - parsed}
+    return edges
+
+
+# Function to persist the named ways of a downloaded city, and the streets merged from them
+def save_ways(city, ways, streets=None):
+    GRAPHS_DIR.mkdir(parents=True, exist_ok=True)
+    ways.to_parquet(edges_path(city), index=False)
+    if streets is not None:
+        streets.to_parquet(streets_path(city), index=False)
+    else:
+        streets_path(city).unlink(missing_ok=True)
+
+
+# Function to tell whether a city is in the store, as ways or as a GraphML dump
+def is_stored(city):
+    return edges_path(city).exists() or graphml_path(city).exists()
+
+
+# Function to load the edge table of a city, converting its GraphML dump if needed; None if unknown
+def load_edges(city):
+    path = edges_path(city)
+    if path.exists():
+        start = time.perf_counter()
+        edges = gpd.read_parquet(path)
+        timings.setdefault(city.lower(), {})['parquet_load'] = time.perf_counter() - start
+        return edges
+    if graphml_path(city).exists():
+        return convert_graphml(graphml_path(city), city)
+    return None
+
+
+# Function to load the streets of a stored city, one row per street name; None if unknown
+def load_streets(city):
+    if streets_path(city).exists():
+        return gpd.read_parquet(streets_path(city))
+    edges = load_edges(city)
+    if edges is None:
+        return None
+    edges = edges.dropna(subset=['name'])
+    return merge_chunks([edges[['name', 'geometry']].astype({'name': object})])
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m gender_streets.graphstore')
+    sub = parser.add_subparsers(dest='command', required=True)
+    convert = sub.add_parser('convert', help='convert GraphML dumps into the store')
+    convert.add_argument('paths', nargs='*', help='defaults to every data/*.graphml')
+    args = parser.parse_args()
+
+    for path in args.paths or sorted(DATA_DIR.glob('*.graphml')):
+        city = Path(path).stem
+        convert_graphml(path, city)
+        load_edges(city)
+        t = timings[city]
+        print(f"{city}: GraphML parse {t['graphml_parse']:.2f}s, parquet load {t['parquet_load']:.3f}s "
+              f"({t['graphml_parse'] / t['parquet_load']:.0f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
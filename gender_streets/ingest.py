@@ -0,0 +1,161 @@
+# Streaming ingestion of named OSM ways, from Overpass or a local .osm extract
+#
+# Ways are parsed one at a time with iterparse and grouped by name in chunks, so
+# there is no routing graph and memory stays close to the size of the result.
+# City names are geocoded with osmnx (Nominatim) to a single boundary first, so free
+# text like "Torino, Italia" works and places sharing a name are not merged.
+import functools
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from gender_streets import CACHE_DIR
+from gender_streets.metrics import incr
+
+OVERPASS_URL = os.environ.get('GENDER_STREETS_OVERPASS_URL', 'https://overpass-api.de/api/interpreter')
+
+# Nominatim instance used by osmnx to geocode city names, its own default when unset
+NOMINATIM_URL = os.environ.get('GENDER_STREETS_NOMINATIM_URL')
+
+# Overpass derives area ids from the closed way or relation they come from
+AREA_OFFSETS = {'way': 2400000000, 'relation': 3600000000}
+
+# Named highways inside the area of the city, with inline geometry
+OVERPASS_QUERY = """[out:xml][timeout:300];
+area({area})->.city;
+way(area.city)["highway"]["name"];
+out geom;"""
+
+CHUNK_SIZE = 5000
+
+
+class _CountingReader:
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes = 0
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.bytes += len(data)
+        return data
+
+
+# Function to get the Overpass area id of a city: osmnx geocodes the name to the most
+# relevant (Multi)Polygon and the area is the way or relation it comes from
+@functools.lru_cache(maxsize=256)
+def area_id(city):
+    import osmnx as ox
+
+    ox.settings.cache_folder = CACHE_DIR / 'osmnx'
+    if NOMINATIM_URL:
+        ox.settings.nominatim_url = NOMINATIM_URL
+    place = ox.geocode_to_gdf(city).iloc[0]
+    if place.osm_type not in AREA_OFFSETS:
+        raise ValueError(f'{city} is geocoded to a {place.osm_type}, not an area')
+    return AREA_OFFSETS[place.osm_type] + int(place.osm_id)
+
+
+# Function to build the Overpass query of an area id
+def overpass_query(area):
+    return OVERPASS_QUERY.format(area=int(area))
+
+
+# Function to iterate over the named highways of an OSM XML stream as
+# (osm_id, version, name, coordinates) without keeping the parsed tree
+def iter_ways(stream):
+    nodes = {}
+    events = ET.iterparse(stream, events=('start', 'end'))
+    _, root = next(events)
+    for event, elem in events:
+        if event != 'end':
+            continue
+        if elem.tag == 'node':
+            # Only raw extracts list nodes, Overpass "out geom" puts coordinates on the nd
+            nodes[elem.get('id')] = (float(elem.get('lon')), float(elem.get('lat')))
+            root.clear()
+        elif elem.tag == 'way':
+            tags = {t.get('k'): t.get('v') for t in elem.iter('tag')}
+            if 'highway' in tags and tags.get('name'):
+                coords = [(float(nd.get('lon')), float(nd.get('lat'))) if nd.get('lat') else nodes.get(nd.get('ref'))
+                          for nd in elem.iter('nd')]
+                coords = [c for c in coords if c is not None]
+                if len(coords) > 1:
+                    yield int(elem.get('id')), int(elem.get('version') or 0), tags['name'], coords
+            root.clear()
+
+
+# Function to turn a list of ways into a GeoDataFrame chunk
+def ways_frame(ways):
+    ids, versions, names, coords = zip(*ways) if ways else ((), (), (), ())
+    return gpd.GeoDataFrame({'osm_id': list(ids), 'version': list(versions), 'name': list(names)},
+                            geometry=[shapely.linestrings(c) for c in coords], crs='epsg:4326')
+
+
+# Function to iterate over chunks of ways, reporting progress after each one; partial(chunk)
+# may return the partial results of the ways so far, reported with the progress
+def iter_chunks(stream, chunk_size=CHUNK_SIZE, total_bytes=None, progress=None, partial=None):
+    reader = _CountingReader(stream)
+    ways, names, batch = 0, set(), []
+
+    def report(frame):
+        nonlocal ways
+        ways += len(frame)
+        names.update(frame.name)
+        info = partial(frame) if partial is not None else {}
+        if progress is not None:
+            fraction = min(reader.bytes / total_bytes, 1.0) if total_bytes else None
+            progress({'ways': ways, 'names': len(names), 'bytes': reader.bytes, 'fraction': fraction, **info})
+        return frame
+
+    for way in iter_ways(reader):
+        batch.append(way)
+        if len(batch) >= chunk_size:
+            yield report(ways_frame(batch))
+            batch = []
+    yield report(ways_frame(batch))
+    incr('osm_bytes', reader.bytes)
+    incr('osm_ways', ways)
+
+
+# Function to merge the ways of every chunk into one (Multi)LineString per street name
+def merge_chunks(chunks):
+    ways = pd.concat(list(chunks), ignore_index=True)
+    codes, names = pd.factorize(ways.name, sort=True)
+    order = np.argsort(codes, kind='stable')
+    merged = shapely.line_merge(shapely.multilinestrings(ways.geometry.values[order], indices=codes[order])) if len(ways) else []
+    return gpd.GeoDataFrame({'name': np.asarray(names, dtype=object)}, geometry=list(merged), crs='epsg:4326')
+
+
+# Function to open a city source: a local .osm file or the Overpass answer for a city name
+def open_source(source, timeout=600):
+    import requests
+
+    path = Path(source)
+    if path.suffix == '.osm' and path.exists():
+        return open(path, 'rb'), path.stat().st_size
+    response = requests.post(OVERPASS_URL, data={'data': overpass_query(area_id(source))}, stream=True, timeout=timeout)
+    response.raise_for_status()
+    response.raw.decode_content = True
+    total = response.headers.get('Content-Length')
+    return response.raw, int(total) if total else None
+
+
+# Function to ingest the named ways of a city, calling partial(chunk) and progress(info)
+# after every chunk
+def stream_ways(source, progress=None, chunk_size=CHUNK_SIZE, partial=None):
+    stream, total = open_source(source)
+    with stream:
+        ways = pd.concat(list(iter_chunks(stream, chunk_size, total, progress, partial)), ignore_index=True)
+    if len(ways) == 0:
+        raise ValueError(f'No named streets found for {source}')
+    return ways
+
+
+# Function to ingest the named streets of a city, one row per street name
+def stream_streets(source, progress=None, chunk_size=CHUNK_SIZE, partial=None):
+    return merge_chunks([stream_ways(source, progress, chunk_size, partial)])
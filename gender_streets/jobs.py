@@ -0,0 +1,121 @@
+# Background jobs for city analyses, shared by every session of the process
+#
+# Requests for the same key are deduplicated: the first one starts the job and the
+# others get the same Job back, so concurrent sessions reuse a single computation.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gender_streets.metrics import metrics
+
+# Failed jobs are kept, and returned as failed, for this many seconds before a retry
+RETRY_AFTER = 60
+
+# Finished jobs kept with their results, the oldest ones are forgotten beyond this many
+MAX_FINISHED = 16
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+class Job:
+    def __init__(self, key):
+        self.key = key
+        self.status = 'pending'
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed')
+
+    # Progress callback handed to the job function
+    def update(self, info):
+        self.progress = dict(info)
+
+    # Block until the job is finished, returns its result or raises its error
+    def wait(self, timeout=None):
+        self.future.result(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def to_dict(self):
+        return {'key': list(self.key), 'status': self.status, 'progress': self.progress,
+                'error': repr(self.error) if self.error else None, 'submitted': self.submitted,
+                'started': self.started, 'finished': self.finished}
+
+
+class JobRunner:
+    def __init__(self, max_workers=2, max_finished=MAX_FINISHED):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gender-streets-job')
+        self.max_finished = max_finished
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    # Start fn(*args, progress=..., **kwargs) for a key, or return the job already running for it
+    def submit(self, key, fn, *args, **kwargs):
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not (job.status == 'failed' and time.time() - job.finished > RETRY_AFTER):
+                return job
+            job = Job(key)
+            self._jobs[key] = job
+            job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+            return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = 'running'
+        job.started = time.time()
+        # finished is set before the status, so every done job has a finish time
+        try:
+            with metrics.run('job', key=job.key):
+                job.result = fn(*args, progress=job.update, **kwargs)
+            job.finished = time.time()
+            job.status = 'done'
+        except Exception as e:
+            job.error = e
+            job.finished = time.time()
+            job.status = 'failed'
+        self._evict()
+        return job.result
+
+    # Forget the oldest finished jobs beyond max_finished, running ones are always kept
+    def _evict(self):
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if job.done and job.finished is not None),
+                              key=lambda job: job.finished)
+            for job in finished[:max(len(finished) - self.max_finished, 0)]:
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+
+    def get(self, key):
+        return self._jobs.get(key)
+
+    # Block until the job of a key is finished, returns its result or raises its error
+    def wait(self, key, timeout=None):
+        return self._jobs[key].wait(timeout)
+
+    def forget(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def status(self):
+        return [job.to_dict() for job in list(self._jobs.values())]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+# Function to get the process-wide job runner
+def default_runner():
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
@@ -0,0 +1,28 @@
+# Layers drawn on the streets map
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+from gender_streets.classifier import GENDERS
+
+# Name of the single feature that stands for all male streets
+MALE_LAYER_NAME = 'basic white man'
+
+
+# Function to merge the streets of one gender into a single feature, or no feature
+# when the city has no street of that gender
+def merge_gender(streets, gender, name):
+    parts = shapely.get_parts(streets.geometry.values[(streets.gender == gender).values])
+    merged = [shapely.line_merge(shapely.multilinestrings(parts))] if len(parts) else []
+    return gpd.GeoDataFrame({'name': [name] * len(merged),
+                             'gender': pd.Categorical([gender] * len(merged), categories=GENDERS),
+                             'geometry': gpd.GeoSeries(merged, crs=streets.crs)}, crs=streets.crs)
+
+
+# Function to build the map layer: named female streets plus one merged male feature,
+# or every street with a gender
+def gender_layer(streets, female_only=True):
+    if not female_only:
+        return streets[streets.gender != 'unknown']
+    male = merge_gender(streets, 'male', MALE_LAYER_NAME)
+    return pd.concat([streets[streets.gender == 'female'], male])
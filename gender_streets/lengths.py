@@ -0,0 +1,124 @@
+# Length-weighted gender metrics: each city is projected once to its local UTM zone, every
+# street is measured at once with shapely, and lengths can be split among districts; the
+# projected streets of utm_streets can be handed to both so they are not projected again
+#
+#   python -m gender_streets.lengths Napoli [--country italy] [--districts quartieri.geojson]
+#
+# Districts are polygons with a name column, read from data/districts/{city}.geojson
+# unless another file is given.
+import argparse
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from gender_streets import DATA_DIR
+from gender_streets.classifier import GENDERS
+from gender_streets.metrics import stage
+
+DISTRICTS_DIR = DATA_DIR / 'districts'
+
+
+# Function to project a GeoSeries to the UTM zone of its center, all coordinates in one call
+def to_utm(geometry):
+    return geometry.to_crs(geometry.estimate_utm_crs())
+
+
+# Function to project the streets of a city to its UTM zone; the parts of a street that overlap
+# (both directions of a two-way street, ways drawn twice) are dissolved by the union of each
+# geometry with itself first, so they count once
+def utm_streets(streets):
+    with stage('utm'):
+        geometry = gpd.GeoSeries(shapely.union(streets.geometry.values, streets.geometry.values),
+                                 index=streets.index, crs=streets.crs)
+        return to_utm(geometry)
+
+
+# Function to get the length in meters of every street, from the stored column when there is one,
+# otherwise from the projected streets given or projected here
+def street_lengths(streets, utm=None):
+    if 'length_m' in streets.columns:
+        return streets['length_m']
+    if not len(streets):
+        return pd.Series(index=streets.index, dtype=float, name='length_m')
+    utm = utm_streets(streets) if utm is None else utm
+    with stage('lengths'):
+        return pd.Series(shapely.length(utm.values), index=streets.index, name='length_m')
+
+
+# Function to sum the street length of each gender, in meters
+def length_by_gender(streets):
+    gender = pd.Categorical(streets.gender, categories=GENDERS)
+    return street_lengths(streets).groupby(gender, observed=False).sum().reindex(GENDERS, fill_value=0.0)
+
+
+# Function to load the districts of a city, None when there is no file for it
+def load_districts(city, path=None):
+    path = Path(path) if path is not None else DISTRICTS_DIR / f'{city.lower()}.geojson'
+    if not path.exists():
+        return None
+    return gpd.read_file(path)
+
+
+# Function to split the street length of each gender among districts: the spatial join pairs
+# each street with the districts it crosses and only the part inside each district counts;
+# the area of each district, from the same projection, gives the km of each gender per km².
+# utm is the projection of the streets by utm_streets, made here when it is not given
+def district_lengths(streets, districts, name='name', utm=None):
+    utm = utm_streets(streets) if utm is None else utm
+    lines = utm.values
+    areas = districts.geometry.to_crs(utm.crs).values
+    with stage('district_join'):
+        street_idx, district_idx = gpd.GeoSeries(areas).sindex.query(lines, predicate='intersects')
+        inside = shapely.length(shapely.intersection(lines[street_idx], areas[district_idx]))
+    pairs = pd.DataFrame({'district': districts[name].values[district_idx],
+                          'gender': pd.Categorical(np.asarray(streets.gender)[street_idx], categories=GENDERS),
+                          'length': inside})
+    table = pairs.pivot_table(index='district', columns='gender', values='length', aggfunc='sum',
+                              observed=False, fill_value=0.0)
+    table = table.reindex(index=pd.unique(districts[name]), columns=GENDERS, fill_value=0.0)
+    table.columns = list(GENDERS)
+    table['total'] = table[GENDERS].sum(axis=1)
+    table['female_share'] = table['female'] / table['total'].where(table['total'] > 0)
+    area = pd.Series(shapely.area(areas) / 1e6, index=districts[name].values).groupby(level=0).sum()
+    table['area_km2'] = area.reindex(table.index)
+    for gender in ('female', 'male'):
+        table[f'{gender}_km_per_km2'] = table[gender] / 1000 / table['area_km2'].where(table['area_km2'] > 0)
+    return table
+
+
+def main():
+    from gender_streets.cache import GenderCache
+    from gender_streets.classifier import SPACY_MODELS
+    from gender_streets.resources import registry
+    from gender_streets.streets import classified_city
+
+    parser = argparse.ArgumentParser(prog='python -m gender_streets.lengths')
+    parser.add_argument('--country', default='italy', help='gender_guesser country')
+    parser.add_argument('--model', help='spaCy model, defaults to the one of the country')
+    parser.add_argument('--districts', help='GeoJSON of the districts, defaults to data/districts/{city}.geojson')
+    parser.add_argument('--name', default='name', help='name column of the districts')
+    parser.add_argument('city')
+    args = parser.parse_args()
+
+    resources = registry()
+    streets = classified_city(args.city, args.country,
+                              lambda: (resources.nlp(args.model or SPACY_MODELS[args.country]), resources.detector()),
+                              cache=GenderCache())
+    lengths = length_by_gender(streets)
+    total = lengths.sum()
+    for gender in GENDERS:
+        print(f'{gender:<8} {lengths[gender] / 1000:>9.1f} km {lengths[gender] / total if total else 0:>6.1%}')
+    districts = load_districts(args.city, args.districts)
+    if districts is not None:
+        table = district_lengths(streets, districts, args.name)
+        print((table[GENDERS + ['total']] / 1000).round(1)
+              .assign(female_share=table.female_share.round(3), area_km2=table.area_km2.round(2),
+                      female_km_per_km2=table.female_km_per_km2.round(2),
+                      male_km_per_km2=table.male_km_per_km2.round(2)).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# Lightweight stage timings and counters of the pipeline
+#
+#   with stage('ner'):
+#       ...
+#   incr('names_classified', len(names))
+#
+# Totals are kept per process. Inside a run(...) block the stages and counters of that
+# run are also collected, logged as one JSON line on the 'gender_streets' logger and,
+# when GENDER_STREETS_METRICS_FILE is set, the totals are written in the Prometheus
+# text format for a node_exporter textfile collector or any other scraper.
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger('gender_streets')
+
+METRICS_FILE = os.environ.get('GENDER_STREETS_METRICS_FILE')
+
+_current_run = contextvars.ContextVar('gender_streets_run', default=None)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    # Time a block of code under a stage name
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                total = self.stages.setdefault(name, {'count': 0, 'seconds': 0.0, 'last': 0.0})
+                total['count'] += 1
+                total['seconds'] += elapsed
+                total['last'] = elapsed
+            current = _current_run.get()
+            if current is not None:
+                current['stages'][name] = current['stages'].get(name, 0.0) + elapsed
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        current = _current_run.get()
+        if current is not None:
+            current['counters'][name] = current['counters'].get(name, 0) + value
+
+    # Collect the stages and counters of a block of code and log them as one line
+    @contextmanager
+    def run(self, name, **labels):
+        current = {'run': name, **labels, 'stages': {}, 'counters': {}}
+        token = _current_run.set(current)
+        start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            _current_run.reset(token)
+            current['seconds'] = round(time.perf_counter() - start, 4)
+            current['stages'] = {k: round(v, 4) for k, v in current['stages'].items()}
+            logger.info(json.dumps(current, default=str, ensure_ascii=False))
+            if METRICS_FILE:
+                self.write_prometheus(METRICS_FILE)
+
+    def snapshot(self):
+        with self._lock:
+            return {'stages': {k: dict(v) for k, v in self.stages.items()}, 'counters': dict(self.counters)}
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    # Take the totals and start again from zero, in a worker process that reports to another one
+    def drain(self):
+        with self._lock:
+            snapshot = {'stages': self.stages, 'counters': self.counters}
+            self.stages, self.counters = {}, {}
+        return snapshot
+
+    # Add the totals drained in another process
+    def merge(self, snapshot):
+        with self._lock:
+            for name, other in snapshot['stages'].items():
+                total = self.stages.setdefault(name, {'count': 0, 'seconds': 0.0, 'last': 0.0})
+                total['count'] += other['count']
+                total['seconds'] += other['seconds']
+                total['last'] = other['last']
+            for name, value in snapshot['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    # Render the totals in the Prometheus text exposition format
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = ['# TYPE gender_streets_stage_seconds_total counter',
+                 *[f'gender_streets_stage_seconds_total{{stage="{k}"}} {v["seconds"]:.6f}'
+                   for k, v in sorted(snapshot['stages'].items())],
+                 '# TYPE gender_streets_stage_calls_total counter',
+                 *[f'gender_streets_stage_calls_total{{stage="{k}"}} {v["count"]}'
+                   for k, v in sorted(snapshot['stages'].items())],
+                 '# TYPE gender_streets_stage_last_seconds gauge',
+                 *[f'gender_streets_stage_last_seconds{{stage="{k}"}} {v["last"]:.6f}'
+                   for k, v in sorted(snapshot['stages'].items())]]
+        for name, value in sorted(snapshot['counters'].items()):
+            lines += [f'# TYPE gender_streets_{name}_total counter', f'gender_streets_{name}_total {value}']
+        return '\n'.join(lines) + '\n'
+
+    # Write the totals atomically, so a scraper never reads a partial file
+    def write_prometheus(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}')
+        tmp.write_text(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+metrics = Metrics()
+stage = metrics.stage
+incr = metrics.incr
+
+
+# Function to print the line of every run on stderr, for the app and the command line tools
+def log_runs(level=logging.INFO):
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(level)
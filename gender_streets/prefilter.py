@@ -0,0 +1,74 @@
+# Cheap pre-classification that settles obvious non-person street names before NER
+#
+#   python -m gender_streets.prefilter [--country italy] [city ...]
+import argparse
+import re
+
+import pandas as pd
+
+# Numbered streets and road refs ("1A", "11", "SP 12", "A4-bis")
+REF_RE = re.compile(r'^[A-Z]{0,4}[\s\-]?\d+[\w\s\-/]*$|^[\d\W]+$')
+
+# Street types and place nouns that also appear in gender_guesser's dictionary
+# or in front of it ("Via Roma", "Corso Torino"), per country; words that are also given
+# names or surnames ("Marina", "Fontana", "Luna") are left to NER
+STOP_WORDS = {
+    'italy': {'via', 'viale', 'piazza', 'piazzale', 'piazzetta', 'corso', 'largo', 'vicolo', 'vico', 'strada',
+              'statale', 'provinciale', 'comunale', 'lungomare', 'salita', 'calle', 'campo', 'fondamenta',
+              'borgo', 'traversa', 'ponte', 'stazione', 'porto', 'roma', 'torino'},
+    'france': {'rue', 'avenue', 'boulevard', 'place', 'impasse', 'allée', 'chemin', 'quai', 'route',
+               'passage', 'cours', 'square', 'pont', 'gare', 'port', 'parc', 'jardin'},
+    'great_britain': {'street', 'road', 'avenue', 'lane', 'way', 'drive', 'place', 'square', 'court', 'close',
+                      'crescent', 'terrace', 'gardens', 'park', 'hill', 'grove', 'row', 'walk', 'mews',
+                      'bridge', 'station', 'church', 'market', 'high', 'green', 'river'},
+}
+
+
+# Function to find the names that cannot be people, returns the reason per name
+# ('ref', 'no_name' or 'stopword') and NaN for the ones that should go through NER
+def prefilter(names, tokens, lookup, country, case_sensitive=False):
+    reason = pd.Series(float('nan'), index=names.index, dtype=object)
+
+    exploded = tokens.explode().dropna().astype(str)
+    lower = exploded.str.lower()
+    is_name = (exploded if case_sensitive else lower).isin(lookup.index)
+    is_person = is_name & ~lower.isin(STOP_WORDS.get(country, set()))
+    any_name = is_name.groupby(level=0).any().reindex(names.index, fill_value=False)
+    any_person = is_person.groupby(level=0).any().reindex(names.index, fill_value=False)
+
+    reason[any_name & ~any_person] = 'stopword'
+    reason[~any_name] = 'no_name'
+    reason[names.astype(str).str.strip().str.match(REF_RE)] = 'ref'
+    return reason
+
+
+# Function to summarize how much NER work the pre-filter avoids
+def prefilter_report(reason):
+    counts = reason.value_counts().to_dict()
+    return {'names': len(reason), 'skipped': float(reason.notna().mean()) if len(reason) else 0.0, **counts}
+
+
+def main():
+    import geopandas as gpd
+    import gender_guesser.detector as gender
+
+    from gender_streets import DATA_DIR, bundled_cities
+    from gender_streets.classifier import gender_lookup, strip_names
+
+    parser = argparse.ArgumentParser(prog='python -m gender_streets.prefilter')
+    parser.add_argument('--country', default='italy')
+    parser.add_argument('cities', nargs='*')
+    args = parser.parse_args()
+
+    d = gender.Detector(case_sensitive=False)
+    lookup = gender_lookup(d, args.country)
+    for city in args.cities or bundled_cities():
+        names = pd.Series(gpd.read_file(DATA_DIR / f'{city}.geojson').name.astype(str).unique())
+        reason = prefilter(names, strip_names(names, args.country), lookup, args.country)
+        report = prefilter_report(reason)
+        print(f"{city:<10} {report['names']:>6} names, {report['skipped']:>4.0%} skipped "
+              f"(ref {report.get('ref', 0)}, no_name {report.get('no_name', 0)}, stopword {report.get('stopword', 0)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# Process-wide registry of the spaCy models and the gender_guesser detector
+#
+# Each model is loaded lazily, once per process, without the components the NER
+# step does not use, and is shared by every session instead of being copied.
+import resource
+import threading
+import time
+
+from gender_streets.classifier import UNUSED_PIPES
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+# Function to get the resident memory of the process in MB
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ResourceRegistry:
+    def __init__(self):
+        self._models = {}
+        self._detector = None
+        self._lock = threading.Lock()
+        self.loads = {}
+
+    # Get a spaCy model, loading it on first use
+    def nlp(self, name):
+        with self._lock:
+            if name not in self._models:
+                import spacy
+
+                rss_before, start = rss_mb(), time.perf_counter()
+                nlp = spacy.load(name, exclude=list(UNUSED_PIPES))
+                self.loads[name] = {'seconds': round(time.perf_counter() - start, 3),
+                                    'rss_mb': round(rss_mb() - rss_before, 1), 'pipes': nlp.pipe_names}
+                self._models[name] = nlp
+            return self._models[name]
+
+    # Get the gender_guesser detector, parsing its dictionary on first use
+    def detector(self):
+        with self._lock:
+            if self._detector is None:
+                import gender_guesser.detector as gender
+
+                rss_before, start = rss_mb(), time.perf_counter()
+                self._detector = gender.Detector(case_sensitive=False)
+                self.loads['gender_guesser'] = {'seconds': round(time.perf_counter() - start, 3),
+                                                'rss_mb': round(rss_mb() - rss_before, 1)}
+            return self._detector
+
+    def stats(self):
+        return {'loaded': dict(self.loads), 'rss_mb': round(rss_mb(), 1)}
+
+
+# Function to get the process-wide registry
+def registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ResourceRegistry()
+        return _registry
@@ -0,0 +1,253 @@
+# Headless HTTP service over the classification pipeline, for dashboards and load tests
+#
+#   python -m gender_streets.service [--port 8000] [--workers 2] [--model it_core_news_sm]
+#
+#   GET  /cities                                             bundled and app cities
+#   GET  /cities/{city}/stats?country=italy                  summary statistics
+#   GET  /cities/{city}/streets?country=italy&simplified=1   classified streets as GeoJSON
+#   POST /classify  {"names": [...], "country": "italy"}     genders of street names
+#   GET  /metrics                                            Prometheus text of the service
+#
+# Cities are read like the app reads its default cities (artifact, then bundled file or
+# graph store) and classified in a pool of worker processes, each loading its models
+# once and sending back the stages and counters it recorded with every body. Responses
+# are kept in a bounded LRU cache and carry a strong ETag, so clients can revalidate
+# with If-None-Match, and identical concurrent requests share one job.
+import argparse
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from gender_streets import DEFAULT_CITIES, bundled_cities
+from gender_streets.classifier import GENDER_COLORS, SPACY_MODELS
+from gender_streets.metrics import incr, metrics, stage
+
+# Most names classified by one /classify request
+MAX_NAMES = 10_000
+
+_gender_cache = None
+
+
+# Function run in the workers: models from the registry, one gender cache per process
+def _resources(country, model):
+    from gender_streets.cache import GenderCache
+    from gender_streets.resources import registry
+
+    global _gender_cache
+    if _gender_cache is None:
+        _gender_cache = GenderCache()
+    resources = registry()
+    return resources.nlp(model or SPACY_MODELS[country]), resources.detector(), _gender_cache
+
+
+def _classified_city(city, country, model):
+    from gender_streets.streets import classified_city
+
+    cache = _resources(country, model)[2]
+    return classified_city(city, country, lambda: _resources(country, model)[:2], cache=cache)
+
+
+def city_stats_body(city, country, model=None):
+    from gender_streets.artifacts import load_stats
+    from gender_streets.stats import city_stats
+
+    stats = load_stats(city, country)
+    if stats is None:
+        stats = city_stats(_classified_city(city, country, model), city, country)
+    return stats.to_json().encode()
+
+
+def city_streets_body(city, country, model=None, simplified=False):
+    from gender_streets.simplify import simplify_streets
+
+    streets = _classified_city(city, country, model)
+    if simplified:
+        streets = simplify_streets(streets)
+    streets = streets.assign(gender_color=streets.gender.map(GENDER_COLORS))
+    return streets[['name', 'gender', 'gender_color', 'geometry']].to_json(drop_id=True).encode()
+
+
+# Function run in the workers: the body built by fn and the metrics recorded since the last call
+def _in_worker(fn, *args):
+    body = fn(*args)
+    return body, metrics.drain()
+
+
+def classify_body(names, country, model=None):
+    from gender_streets.classifier import classify_names
+
+    nlp, d, cache = _resources(country, model)
+    genders = classify_names(names, nlp, d, country, cache=cache)
+    return json.dumps({'country': country, 'genders': genders.to_dict()}, ensure_ascii=False).encode()
+
+
+class ResponseCache:
+    def __init__(self, max_bytes=256 * 2 ** 20, max_entries=1024):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Cached (etag, body, media_type) of a key, None if missing
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    # Store a body under a key, evicting the least recently used ones past the bounds
+    def put(self, key, body, media_type):
+        entry = (f'"{hashlib.sha1(body).hexdigest()}"', body, media_type)
+        if key in self._entries:
+            self.bytes -= len(self._entries.pop(key)[1])
+        self._entries[key] = entry
+        self.bytes += len(body)
+        while len(self._entries) > 1 and (self.bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, (_, old, _) = self._entries.popitem(last=False)
+            self.bytes -= len(old)
+        return entry
+
+
+class Service:
+    def __init__(self, workers=None, model=None, max_bytes=256 * 2 ** 20):
+        self.workers = workers
+        self.model = model
+        self.cache = ResponseCache(max_bytes=max_bytes)
+        self.pool = None
+        self._pending = {}
+
+    # Body of a key, from the cache, from the same request already running, or from the pool
+    async def cached(self, key, media_type, fn, *args):
+        entry = self.cache.get(key)
+        if entry is not None:
+            incr('service_cache_hits')
+            return entry, 'hit'
+        if key in self._pending:
+            incr('service_cache_shared')
+            return await asyncio.shield(self._pending[key]), 'shared'
+        incr('service_cache_misses')
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            with stage(f'service_{key[0]}'):
+                loop = asyncio.get_running_loop()
+                body, worker_metrics = await loop.run_in_executor(self.pool, _in_worker, fn, *args)
+            metrics.merge(worker_metrics)
+            entry = self.cache.put(key, body, media_type)
+            future.set_result(entry)
+            return entry, 'miss'
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved here so that a failure nobody else waited for is not logged as lost
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+    async def respond(self, request, key, media_type, fn, *args):
+        try:
+            (etag, body, media_type), status = await self.cached(key, media_type, fn, *args)
+        except LookupError as e:
+            return JSONResponse({'error': str(e)}, status_code=404)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'X-Cache': status}
+        if etag in request.headers.get('if-none-match', ''):
+            incr('service_not_modified')
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type=media_type, headers=headers)
+
+    # Function to check the country query parameter, None if unknown
+    @staticmethod
+    def country(request):
+        country = request.query_params.get('country', 'italy')
+        return country if country in SPACY_MODELS else None
+
+    async def cities(self, request):
+        return JSONResponse({'default': DEFAULT_CITIES, 'bundled': [c.title() for c in bundled_cities()]})
+
+    async def stats(self, request):
+        city, country = request.path_params['city'], self.country(request)
+        if country is None:
+            return JSONResponse({'error': f'country must be one of {list(SPACY_MODELS)}'}, status_code=400)
+        return await self.respond(request, ('stats', city.lower(), country), 'application/json',
+                                  city_stats_body, city, country, self.model)
+
+    async def streets(self, request):
+        city, country = request.path_params['city'], self.country(request)
+        if country is None:
+            return JSONResponse({'error': f'country must be one of {list(SPACY_MODELS)}'}, status_code=400)
+        simplified = request.query_params.get('simplified', '0') not in ('0', 'false', '')
+        return await self.respond(request, ('streets', city.lower(), country, simplified), 'application/geo+json',
+                                  city_streets_body, city, country, self.model, simplified)
+
+    async def classify(self, request):
+        try:
+            payload = await request.json()
+            if not isinstance(payload['names'], list):
+                raise TypeError('names must be a list')
+            names = [str(n) for n in payload['names']]
+            country = payload.get('country', 'italy')
+        except (ValueError, KeyError, TypeError):
+            return JSONResponse({'error': 'expected {"names": [...], "country": "italy"}'}, status_code=400)
+        if country not in SPACY_MODELS or len(names) > MAX_NAMES:
+            return JSONResponse({'error': f'country must be one of {list(SPACY_MODELS)}, '
+                                          f'at most {MAX_NAMES} names'}, status_code=400)
+        names = sorted(set(names))
+        digest = hashlib.sha1('\n'.join(names).encode()).hexdigest()
+        return await self.respond(request, ('classify', digest, country), 'application/json',
+                                  classify_body, names, country, self.model)
+
+    async def metrics(self, request):
+        text = metrics.to_prometheus() + (f'# TYPE gender_streets_service_cache_bytes gauge\n'
+                                          f'gender_streets_service_cache_bytes {self.cache.bytes}\n'
+                                          f'# TYPE gender_streets_service_cache_entries gauge\n'
+                                          f'gender_streets_service_cache_entries {len(self.cache)}\n')
+        return Response(text, media_type='text/plain; version=0.0.4')
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            yield
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+
+# Function to build the ASGI app
+def create_app(workers=None, model=None, max_bytes=256 * 2 ** 20):
+    service = Service(workers=workers, model=model, max_bytes=max_bytes)
+    app = Starlette(routes=[Route('/cities', service.cities),
+                            Route('/cities/{city}/stats', service.stats),
+                            Route('/cities/{city}/streets', service.streets),
+                            Route('/classify', service.classify, methods=['POST']),
+                            Route('/metrics', service.metrics)],
+                    lifespan=service.lifespan)
+    app.state.service = service
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog='python -m gender_streets.service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=2, help='model worker processes')
+    parser.add_argument('--model', help='spaCy model for every country, defaults to the one of each country')
+    parser.add_argument('--cache-mb', type=int, default=256, help='size of the response cache')
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.workers, args.model, args.cache_mb * 2 ** 20), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# Lighter map payloads: reversed duplicate segments dropped, zoom-aware
+# Douglas-Peucker simplification and coordinates rounded to ~10 cm
+import math
+
+import numpy as np
+import pandas as pd
+import shapely
+
+# Decimals kept in the coordinates sent to the browser (1e-6 degrees is ~10 cm)
+PRECISION = 6
+
+# Simplification tolerance in pixels at the zoom the map is shown
+PIXEL_TOLERANCE = 0.5
+
+# Deepest zoom a variant is simplified for
+MAX_ZOOM = 18
+
+
+# Function to get the size in degrees of a screen pixel at a web-map zoom level
+def pixel_size(zoom):
+    return 360 / (256 * 2 ** zoom)
+
+
+# Function to get the Douglas-Peucker tolerance of a zoom level
+def tolerance_for_zoom(zoom):
+    return PIXEL_TOLERANCE * pixel_size(zoom)
+
+
+# Function to get the zoom that fits bounds in a map of the given width
+def zoom_for_bounds(bounds, pixels=700):
+    span = max(bounds[2] - bounds[0], bounds[3] - bounds[1], 1e-9)
+    return int(min(MAX_ZOOM, max(1, math.floor(math.log2(360 * pixels / (256 * span))))))
+
+
+# Function to get the zoom whose variant is shown at a map zoom: the one that fits the bounds
+# and then every second level, so the tolerance is at most one pixel at the zoom shown
+def zoom_bucket(zoom, bounds):
+    base = zoom_for_bounds(bounds)
+    if zoom is None or zoom <= base:
+        return base
+    return min(MAX_ZOOM, base + (int(zoom) - base) // 2 * 2)
+
+
+# Function to drop the parts of multi-lines that repeat another part, in either direction
+def drop_reversed_duplicates(geoms):
+    parts, index = shapely.get_parts(geoms, return_index=True)
+    keys = pd.DataFrame({'index': index, 'wkb': shapely.to_wkb(shapely.normalize(parts))})
+    keep = ~keys.duplicated().values
+    # Rows without parts (empty or missing geometries) are left as they are
+    result = np.array(geoms, dtype=object)
+    shapely.multilinestrings(parts[keep], indices=index[keep], out=result)
+    return shapely.line_merge(result)
+
+
+# Function to round coordinates to a fixed number of decimals
+def quantize(geoms, precision=PRECISION):
+    return shapely.transform(geoms, lambda c: np.round(c, precision))
+
+
+# Function to build the lighter variant of a streets GeoDataFrame shown at a zoom level
+def simplify_streets(streets, zoom=None, precision=PRECISION):
+    if zoom is None:
+        zoom = zoom_for_bounds(streets.total_bounds)
+    geoms = drop_reversed_duplicates(streets.geometry.values)
+    geoms = shapely.simplify(geoms, tolerance_for_zoom(zoom), preserve_topology=False)
+    simplified = streets.copy()
+    simplified['geometry'] = quantize(geoms, precision)
+    return simplified
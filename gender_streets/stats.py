@@ -0,0 +1,53 @@
+# Summary statistics of a classified city, computed once and shared by pages and exports
+import json
+from dataclasses import asdict, dataclass, field
+
+import pandas as pd
+
+from gender_streets.classifier import GENDERS
+from gender_streets.lengths import length_by_gender
+
+
+@dataclass(frozen=True)
+class CityStats:
+    city: str
+    country: str
+    total: int
+    counts: dict = field(default_factory=dict)
+    # Total street length per gender in meters, measured in the local UTM zone
+    lengths: dict = field(default_factory=dict)
+
+    # Percentage shown in the page metrics
+    def percent(self, gender):
+        return int(100 * round(self.counts[gender] / self.total + 0.001, 2))
+
+    # Male streets for every female one
+    @property
+    def ratio(self):
+        return round(self.counts['male'] / (self.counts['female'] + 0.001))
+
+    def length_share(self, gender):
+        total = sum(self.lengths.values())
+        return self.lengths[gender] / total if total else 0.0
+
+    # Percentage of the street length shown in the page metrics
+    def length_percent(self, gender):
+        return int(100 * round(self.length_share(gender) + 0.001, 2))
+
+    def to_dict(self):
+        return {**asdict(self), 'ratio': self.ratio,
+                'percent': {g: self.percent(g) for g in GENDERS} if self.total else {},
+                'length_percent': {g: self.length_percent(g) for g in GENDERS} if self.total else {}}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+
+# Function to compute the statistics of a classified streets GeoDataFrame
+def city_stats(streets, city, country):
+    gender = pd.Categorical(streets.gender, categories=GENDERS)
+    counts = pd.Series(gender).value_counts()
+    lengths = length_by_gender(streets)
+    return CityStats(city=city, country=country, total=len(streets),
+                     counts={g: int(counts[g]) for g in GENDERS},
+                     lengths={g: round(float(lengths[g]), 1) for g in GENDERS})
@@ -0,0 +1,88 @@
+# Street data sources: the bundled data/*.geojson files and OpenStreetMap
+import geopandas as gpd
+import pandas as pd
+
+from gender_streets import DATA_DIR
+from gender_streets.artifacts import artifact_path, classify_streets, load_artifact
+from gender_streets.classifier import GENDERS, classify_names
+from gender_streets.graphstore import is_stored, load_streets, save_ways
+from gender_streets.ingest import merge_chunks, stream_ways
+from gender_streets.metrics import stage
+
+
+# Function to transform name list to string
+def transform_name(x):
+    return ', '.join(x) if isinstance(x, list) else x
+
+
+# Function to get the bundled file of a city
+def disk_path(city):
+    return DATA_DIR / f'{city.lower()}.geojson'
+
+
+# Function to tell whether a city can be classified without downloading it: it has an
+# artifact, a bundled file or ways in the graph store
+def has_local_data(city, country):
+    return artifact_path(city, country).exists() or disk_path(city).exists() or is_stored(city)
+
+
+# Function to load streets data from disk
+def load_from_disk(city):
+    with stage('load_disk'):
+        streets = gpd.read_file(disk_path(city))
+    return streets
+
+
+# Function to download streets data from OpenStreetMap, calling partial(chunk) and progress(info)
+# while streaming; the ways are kept in the graph store so the city is not downloaded again
+def download_from_osm(city, progress=None, partial=None):
+    with stage('osm_download'):
+        ways = stream_ways(city, progress=progress, partial=partial)
+    with stage('linemerge'):
+        streets = merge_chunks([ways])
+    save_ways(city, ways, streets)
+    return streets
+
+
+# Function to classify the names of each chunk of ways as it is downloaded, returns the
+# number of names of each gender so far; the genders go to the cache, which the
+# classification of the merged streets then reads them back from
+def partial_genders(nlp, d, country, cache):
+    genders = pd.Series(dtype=object)
+
+    def partial(chunk):
+        nonlocal genders
+        names = chunk.name.astype(str)
+        fresh = classify_names(names[~names.isin(genders.index)], nlp, d, country, cache=cache)
+        genders = pd.concat([genders, fresh])
+        counts = genders.value_counts()
+        return {gender: int(counts.get(gender, 0)) for gender in GENDERS}
+
+    return partial
+
+
+# Function to get and classify the streets of a city that is not bundled, from the graph
+# store when possible and otherwise from OpenStreetMap, with the genders found so far in
+# the progress when there is a cache
+def analyze_city(city, nlp, d, country, cache=None, progress=None):
+    streets = load_streets(city)
+    if streets is None:
+        partial = partial_genders(nlp, d, country, cache) if cache is not None else None
+        streets = download_from_osm(city, progress=progress, partial=partial)
+    return classify_streets(streets, nlp, d, country, cache=cache)
+
+
+# Function to get the classified streets of a local city: its prebuilt artifact when there
+# is one, otherwise its bundled file or stored graph classified with load_nlp() -> (nlp, d)
+def classified_city(city, country, load_nlp, cache=None):
+    streets = load_artifact(city, country)
+    if streets is not None:
+        return streets
+    if disk_path(city).exists():
+        streets = load_from_disk(city)
+    else:
+        streets = load_streets(city)
+        if streets is None:
+            raise LookupError(f'No local data for {city}')
+    nlp, d = load_nlp()
+    return classify_streets(streets, nlp, d, country, cache=cache)
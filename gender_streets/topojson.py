@@ -0,0 +1,53 @@
+# TopoJSON encoding of the streets layer: each line part is stored once as a
+# quantized, delta-encoded arc and features only reference arcs by index
+import numpy as np
+import pandas as pd
+import shapely
+
+# Grid of the quantized coordinates along each axis
+QUANTIZATION = 1_000_000
+
+
+# Function to encode a streets GeoDataFrame as a TopoJSON topology dict
+def to_topojson(streets, object_name='streets', properties=('name', 'gender'), quantization=QUANTIZATION):
+    parts, index = shapely.get_parts(streets.geometry.values, return_index=True)
+    normalized = shapely.normalize(parts)
+    arc_ids, unique = pd.factorize(pd.Series(shapely.to_wkb(normalized)))
+    # Parts whose direction was flipped by normalize reference their arc reversed (~id)
+    reversed_ = ~shapely.equals_exact(shapely.get_point(parts, 0), shapely.get_point(normalized, 0), 0)
+    refs = np.where(reversed_, ~arc_ids, arc_ids)
+
+    first = pd.Series(np.arange(len(arc_ids))).groupby(arc_ids).first().values
+    coords, coord_index = shapely.get_coordinates(normalized[first], return_index=True)
+
+    x0, y0, x1, y1 = streets.total_bounds
+    scale = np.array([(x1 - x0) / (quantization - 1) or 1, (y1 - y0) / (quantization - 1) or 1])
+    quantized = np.round((coords - [x0, y0]) / scale).astype(np.int64)
+    deltas = np.diff(quantized, axis=0, prepend=[[0, 0]])
+    starts = np.r_[0, np.flatnonzero(np.diff(coord_index)) + 1]
+    deltas[starts] = quantized[starts]
+    arcs = [a.tolist() for a in np.split(deltas, starts[1:])]
+
+    columns = [p for p in properties if p in streets.columns]
+    records = streets[columns].astype(object).where(streets[columns].notna(), None).to_dict('records')
+    arcs_by_row = pd.Series(refs).groupby(index).apply(list)
+    geometries = [{'type': 'MultiLineString', 'arcs': [[int(a)] for a in arcs_by_row.get(i, [])], 'properties': record}
+                  for i, record in enumerate(records)]
+
+    return {
+        'type': 'Topology',
+        'bbox': [float(x0), float(y0), float(x1), float(y1)],
+        'transform': {'scale': scale.tolist(), 'translate': [float(x0), float(y0)]},
+        'objects': {object_name: {'type': 'GeometryCollection', 'geometries': geometries}},
+        'arcs': arcs,
+    }
+
+
+# Function to decode one feature back to a shapely geometry, used to check the encoding
+def feature_geometry(topology, feature):
+    scale, translate = topology['transform']['scale'], topology['transform']['translate']
+    lines = []
+    for (ref,) in feature['arcs']:
+        arc = np.cumsum(topology['arcs'][ref if ref >= 0 else ~ref], axis=0) * scale + translate
+        lines.append(arc if ref >= 0 else arc[::-1])
+    return shapely.multilinestrings([shapely.linestrings(line) for line in lines])
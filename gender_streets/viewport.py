@@ -0,0 +1,61 @@
+# Spatial index of the streets on the map, so that only the ones in view are sent
+#
+# The map keeps its tiles and position while the streets layer is replaced with the
+# streets intersecting the bounds st_folium returns, capped to MAX_FEATURES per view.
+import os
+
+import numpy as np
+import shapely
+
+# Most streets sent for one view, the longest ones first
+MAX_FEATURES = int(os.environ.get('GENDER_STREETS_MAX_FEATURES', 2000))
+
+# Fraction of the view added on each side, so that small pans do not show cut streets
+PADDING = 0.25
+
+
+# Function to turn the bounds returned by st_folium into (minx, miny, maxx, maxy), None if unset
+def folium_bounds(bounds):
+    try:
+        south_west, north_east = bounds['_southWest'], bounds['_northEast']
+        box = (south_west['lng'], south_west['lat'], north_east['lng'], north_east['lat'])
+    except (KeyError, TypeError):
+        return None
+    return None if None in box else tuple(float(b) for b in box)
+
+
+# Function to grow bounds by a fraction of their size on each side
+def pad_bounds(bounds, padding=PADDING):
+    minx, miny, maxx, maxy = bounds
+    dx, dy = (maxx - minx) * padding, (maxy - miny) * padding
+    return minx - dx, miny - dy, maxx + dx, maxy + dy
+
+
+class StreetIndex:
+    def __init__(self, streets):
+        self.streets = streets.reset_index(drop=True)
+        geometries = self.streets.geometry.values
+        self.tree = shapely.STRtree(geometries)
+        self.lengths = shapely.length(geometries)
+        total_bounds = self.streets.total_bounds
+        self.bounds = tuple(float(b) for b in total_bounds) if np.isfinite(total_bounds).all() else None
+
+    def __len__(self):
+        return len(self.streets)
+
+    # Streets intersecting the bounds, clipped to them, at most limit of them
+    def query(self, bounds=None, limit=MAX_FEATURES, padding=PADDING):
+        if bounds is None or self.bounds is None:
+            bounds = self.bounds
+        if bounds is None:
+            return self.streets
+        box = pad_bounds(bounds, padding)
+        hits = self.tree.query(shapely.box(*box), predicate='intersects')
+        if limit is not None and len(hits) > limit:
+            hits = hits[np.argsort(-self.lengths[hits], kind='stable')[:limit]]
+        # Keep the order of the layer, which decides what is drawn on top
+        view = self.streets.iloc[np.sort(hits)].copy()
+        geometries = view.geometry.values
+        inside = shapely.contains_properly(shapely.box(*box), geometries)
+        view['geometry'] = np.where(inside, geometries, shapely.clip_by_rect(geometries, *box))
+        return view
@@ -0,0 +1,32 @@
+# Shared fixtures: the gender_guesser detector, a stand-in spaCy model instead of the
+# downloaded ones, and the persistent stores pointed at a temporary directory
+import os
+import tempfile
+
+# Read when the package is imported
+os.environ['GENDER_STREETS_CACHE'] = tempfile.mkdtemp(prefix='gender_streets_tests_')
+os.environ['GENDER_STREETS_ARTIFACTS'] = tempfile.mkdtemp(prefix='gender_streets_tests_artifacts_')
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def detector():
+    import gender_guesser.detector as gender
+
+    return gender.Detector(case_sensitive=False)
+
+
+# Blank Italian pipeline that tags every run of words as a person, saved so it loads by path
+@pytest.fixture(scope='session')
+def person_model(tmp_path_factory):
+    from benchmarks.bench_suite import STAND_IN, stand_in_model
+
+    return stand_in_model(tmp_path_factory.mktemp('models') / STAND_IN)
+
+
+@pytest.fixture(scope='session')
+def nlp(person_model):
+    import spacy
+
+    return spacy.load(person_model)
@@ -0,0 +1,44 @@
+import pytest
+
+from gender_streets import bundled_cities
+from gender_streets.batch import classify_file, load_checkpoint
+from gender_streets.streets import load_from_disk
+
+
+class Interrupted(Exception):
+    pass
+
+
+# One name per line, a few hundred rows with repeats across chunks
+@pytest.fixture(scope='module')
+def names_file(tmp_path_factory):
+    names = load_from_disk(bundled_cities()[0].title()).name.astype(str).tolist()
+    path = tmp_path_factory.mktemp('batch') / 'names.txt'
+    path.write_text('\n'.join(names + names[::2]) + '\n', encoding='utf-8')
+    return path
+
+
+def run(source, output, model, **kwargs):
+    return classify_file(source, output, model=model, chunk_size=50, cached=False, **kwargs)
+
+
+def interrupt(checkpoint):
+    raise Interrupted
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_resumed_run_matches_uninterrupted(names_file, person_model, tmp_path, workers):
+    expected = tmp_path / 'expected.csv'
+    run(names_file, expected, person_model, workers=1)
+
+    output = tmp_path / 'genders.csv'
+    with pytest.raises(Interrupted):
+        run(names_file, output, person_model, workers=1, progress=interrupt)
+    assert load_checkpoint(output)['rows'] == 50 and not load_checkpoint(output)['done']
+    # Rows written after the checkpoint, as by a crash during a write, are dropped
+    with open(output, 'a', encoding='utf-8') as f:
+        f.write('Via Rotta,fem')
+
+    checkpoint = run(names_file, output, person_model, workers=workers)
+    assert checkpoint['done'] and checkpoint == {**load_checkpoint(expected), 'seconds': checkpoint['seconds']}
+    assert output.read_bytes() == expected.read_bytes()
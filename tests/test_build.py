@@ -0,0 +1,50 @@
+import shutil
+
+import pytest
+
+from gender_streets import ARTIFACTS_DIR
+from gender_streets import build as build_module
+from gender_streets.artifacts import artifact_path, load_artifact, load_stats
+from gender_streets.build import build, load_manifest, save_manifest
+
+CITIES = ['Susa', 'Collegno']
+
+
+@pytest.fixture
+def built(person_model):
+    shutil.rmtree(ARTIFACTS_DIR, ignore_errors=True)
+    return build(CITIES, ['italy'], workers=1, offline=True, model=person_model)
+
+
+def built_at(manifest):
+    return {key: entry['built_at'] for key, entry in manifest.items()}
+
+
+def test_build_writes_artifacts(built):
+    for city in CITIES:
+        entry = built[f'{city.lower()}_italy']
+        assert 'error' not in entry and entry['pipeline'] == build_module.PIPELINE_VERSION
+        assert artifact_path(city, 'italy').exists()
+        assert len(load_artifact(city, 'italy')) == entry['streets'] == load_stats(city, 'italy').total
+    assert load_manifest() == built
+
+
+def test_up_to_date_cities_are_skipped(built, person_model):
+    again = build(CITIES, ['italy'], workers=1, offline=True, model=person_model)
+    assert built_at(again) == built_at(built)
+
+
+def test_interrupted_build_resumes(built, person_model):
+    manifest = dict(built)
+    del manifest['collegno_italy']
+    save_manifest(manifest)
+    resumed = build(CITIES, ['italy'], workers=1, offline=True, model=person_model)
+    assert resumed['susa_italy']['built_at'] == built['susa_italy']['built_at']
+    assert resumed['collegno_italy']['built_at'] > built['collegno_italy']['built_at']
+
+
+def test_pipeline_change_rebuilds(built, person_model, monkeypatch):
+    monkeypatch.setattr(build_module, 'PIPELINE_VERSION', 'changed')
+    rebuilt = build(CITIES, ['italy'], workers=1, offline=True, model=person_model)
+    assert all(rebuilt[k]['built_at'] > built[k]['built_at'] for k in built)
+    assert all(entry['pipeline'] == 'changed' for entry in rebuilt.values())
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from gender_streets.cache import GenderCache
+from gender_streets.classifier import classify_names
+
+
+def test_no_name_left_for_the_model(nlp, detector):
+    genders = classify_names(['1A', 'SP 12'], nlp, detector, 'italy')
+    assert (genders == 'unknown').all()
+
+
+def test_all_names_cached(nlp, detector, tmp_path):
+    cache = GenderCache(tmp_path / 'genders.sqlite')
+    names = ['Via Roma', '1A', 'Via Giuseppe Verdi']
+    first = classify_names(names, nlp, detector, 'italy', cache=cache)
+    second = classify_names(names, nlp, detector, 'italy', cache=cache)
+    assert cache.hits == len(names)
+    pd.testing.assert_series_equal(first, second)
+
+
+# Given names and surnames that are also nouns still go through NER
+def test_names_that_are_also_nouns(nlp, detector):
+    genders = classify_names(['Campiello S. Marina', 'Calle Fontana', 'Corte Fontana', 'Via Roma'],
+                             nlp, detector, 'italy')
+    assert genders.to_dict() == {'Campiello S. Marina': 'female', 'Calle Fontana': 'male',
+                                 'Corte Fontana': 'male', 'Via Roma': 'unknown'}
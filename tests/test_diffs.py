@@ -0,0 +1,72 @@
+import io
+import xml.etree.ElementTree as ET
+
+import geopandas as gpd
+import pytest
+import shapely
+
+from benchmarks.overpass_stub import osmchange_xml
+from gender_streets.artifacts import load_artifact
+from gender_streets.build import build, is_fresh, load_manifest
+from gender_streets.cache import GenderCache
+from gender_streets.diffs import iter_changes, refresh_city
+from gender_streets.graphstore import save_ways
+from gender_streets.streets import load_from_disk
+
+CHANGES = [('create', 1, 1, 'Via Roma', [(7.0, 45.0), (7.1, 45.0)]),
+           ('modify', 2, 3, 'Via Milano', [(7.0, 45.1), (7.1, 45.1)]),
+           ('delete', 3, 2, None, None)]
+
+
+def test_changes_are_read_back():
+    assert list(iter_changes(io.BytesIO(osmchange_xml(CHANGES).encode()))) == CHANGES
+
+
+def test_parsed_elements_are_cleared(monkeypatch):
+    roots = []
+    iterparse = ET.iterparse
+
+    def spy(*args, **kwargs):
+        events = iterparse(*args, **kwargs)
+        for event, elem in events:
+            if not roots:
+                roots.append(elem)
+            yield event, elem
+
+    monkeypatch.setattr(ET, 'iterparse', spy)
+    changes = [('modify', i, 1, f'Via {i}', [(7.0, 45.0), (7.1, 45.1)]) for i in range(5000)]
+    kept = [sum(1 for _ in roots[0].iter('way')) for _ in iter_changes(io.BytesIO(osmchange_xml(changes).encode()))]
+    # Only the ways parsed ahead of the one being read stay in the tree
+    assert len(kept) == len(changes) and max(kept) < 500
+    assert len(roots[0]) == 0
+
+
+# A city known only from its stored ways, built into an artifact
+@pytest.fixture
+def stored_city(person_model):
+    streets = load_from_disk('Susa')
+    parts = streets.explode(index_parts=False).reset_index(drop=True)
+    ways = gpd.GeoDataFrame({'osm_id': range(1, len(parts) + 1), 'version': 1, 'name': parts.name.astype(str)},
+                            geometry=parts.geometry.values, crs=parts.crs)
+    save_ways('Storedville', ways)
+    build(['Storedville'], ['italy'], workers=1, model=person_model)
+    return ways
+
+
+def test_refresh_rewrites_the_artifact(stored_city, nlp, detector, tmp_path, person_model):
+    way = stored_city.iloc[0]
+    changes = tmp_path / 'changes.osc'
+    changes.write_text(osmchange_xml([('modify', int(way.osm_id), 2, 'Via Anna Frank',
+                                       shapely.get_coordinates(way.geometry).tolist())]))
+    before = load_manifest()['storedville_italy']
+    refresh_city('Storedville', changes, nlp, detector, 'italy', cache=GenderCache(tmp_path / 'genders.sqlite'))
+
+    assert 'Via Anna Frank' in set(load_artifact('Storedville', 'italy').name)
+    entry = load_manifest()['storedville_italy']
+    assert entry['built_at'] > before['built_at'] and entry['input_hash'] != before['input_hash']
+    assert is_fresh(entry, 'Storedville', 'italy', person_model)
+
+
+def test_changed_store_is_not_fresh(stored_city, person_model):
+    save_ways('Storedville', stored_city.iloc[1:])
+    assert not is_fresh(load_manifest()['storedville_italy'], 'Storedville', 'italy', person_model)
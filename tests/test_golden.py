@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+from benchmarks.bench_suite import GOLDEN_PATH, STAND_IN
+from gender_streets import bundled_cities
+from gender_streets.artifacts import classify_streets
+from gender_streets.classifier import GENDERS
+from gender_streets.streets import load_from_disk
+
+GOLDEN = json.loads(GOLDEN_PATH.read_text())[STAND_IN]
+
+
+def test_every_city_has_golden_counts():
+    for country, counts in GOLDEN.items():
+        assert sorted(city.lower() for city in counts) == bundled_cities(), country
+
+
+# After an intended accuracy change:
+#   python -m benchmarks.bench_suite --model always_per --country <country> --update-golden
+@pytest.mark.parametrize('country', sorted(GOLDEN))
+@pytest.mark.parametrize('city', [city.title() for city in bundled_cities()])
+def test_counts_match_golden(city, country, nlp, detector):
+    streets = classify_streets(load_from_disk(city), nlp, detector, country)
+    assert {g: int((streets.gender == g).sum()) for g in GENDERS} == GOLDEN[country][city]
@@ -0,0 +1,52 @@
+import geopandas as gpd
+import pytest
+import shapely
+
+from benchmarks.overpass_stub import relation_id, serve
+from gender_streets import ingest
+from gender_streets.cache import GenderCache
+from gender_streets.ingest import AREA_OFFSETS, area_id, merge_chunks, overpass_query, stream_streets
+from gender_streets.streets import partial_genders
+
+
+# Overpass and Nominatim answered by the local stand-in
+@pytest.fixture(scope='module')
+def stub():
+    server, url = serve()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(ingest, 'OVERPASS_URL', url)
+        mp.setattr(ingest, 'NOMINATIM_URL', url.rpartition('/api/')[0])
+        area_id.cache_clear()
+        yield
+        area_id.cache_clear()
+    server.shutdown()
+
+
+def test_free_text_is_geocoded_to_one_area(stub):
+    assert area_id('Torino, Italia') == area_id('Torino') == AREA_OFFSETS['relation'] + relation_id('Torino')
+    assert overpass_query(area_id('Torino')) == ingest.OVERPASS_QUERY.format(area=area_id('Torino'))
+
+
+def test_unknown_place_fails(stub):
+    with pytest.raises(ValueError):
+        stream_streets('Atlantide')
+
+
+def test_progress_reports_partial_genders(stub, nlp, detector, tmp_path):
+    reports = []
+    streets = stream_streets('Aosta', progress=reports.append, chunk_size=100,
+                             partial=partial_genders(nlp, detector, 'italy', GenderCache(tmp_path / 'genders.sqlite')))
+    assert len(reports) > 2
+    assert [r['ways'] for r in reports] == sorted(r['ways'] for r in reports)
+    last = reports[-1]
+    assert last['female'] + last['male'] + last['unknown'] == last['names'] == len(streets)
+
+
+def test_merge_chunks_with_unsorted_names():
+    lines = [shapely.LineString([(0, i), (1, i)]) for i in range(4)]
+    chunks = [gpd.GeoDataFrame({'name': ['Via Roma', 'Corso Italia']}, geometry=lines[:2], crs='epsg:4326'),
+              gpd.GeoDataFrame({'name': ['Via Roma', 'Borgo Dora']}, geometry=lines[2:], crs='epsg:4326')]
+    streets = merge_chunks(chunks).set_index('name')
+    assert sorted(streets.index) == ['Borgo Dora', 'Corso Italia', 'Via Roma']
+    assert shapely.get_num_geometries(streets.geometry['Via Roma']) == 2
+    assert streets.geometry['Borgo Dora'].equals(lines[3])
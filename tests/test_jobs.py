@@ -0,0 +1,41 @@
+import threading
+
+from gender_streets.jobs import JobRunner
+
+
+def square(x, progress=None):
+    return x * x
+
+
+def test_same_key_shares_one_job():
+    runner = JobRunner(max_workers=1)
+    release = threading.Event()
+    first = runner.submit(('a',), lambda progress=None: release.wait())
+    assert runner.submit(('a',), square, 2) is first
+    release.set()
+    assert runner.wait(('a',)) is True
+    runner.shutdown()
+
+
+def test_finished_jobs_are_bounded():
+    runner = JobRunner(max_workers=1, max_finished=3)
+    release = threading.Event()
+    running = runner.submit(('running',), lambda progress=None: release.wait())
+    jobs = [runner.submit((i,), square, i) for i in range(10)]
+    release.set()
+    assert [job.wait() for job in jobs] == [i * i for i in range(10)]
+    running.wait()
+    keys = [tuple(job['key']) for job in runner.status()]
+    assert len(keys) == 3 and (9,) in keys and (0,) not in keys
+    # A forgotten job is started again
+    assert runner.submit((0,), square, 0) is not jobs[0]
+    runner.shutdown()
+
+
+def test_done_jobs_have_a_finish_time():
+    runner = JobRunner(max_workers=4, max_finished=1)
+    jobs = [runner.submit((i,), square, i) for i in range(50)]
+    for job in jobs:
+        job.wait()
+        assert job.finished is not None and job.finished >= job.started
+    runner.shutdown()
@@ -0,0 +1,21 @@
+import geopandas as gpd
+import shapely
+
+from gender_streets.layers import MALE_LAYER_NAME, gender_layer
+
+
+def streets(genders):
+    lines = [shapely.LineString([(0, i), (1, i)]) for i in range(len(genders))]
+    return gpd.GeoDataFrame({'name': [f'Via {i}' for i in range(len(genders))], 'gender': genders},
+                            geometry=lines, crs='epsg:4326')
+
+
+def test_male_streets_are_one_feature():
+    layer = gender_layer(streets(['female', 'male', 'male', 'unknown']))
+    assert layer.name.tolist() == ['Via 0', MALE_LAYER_NAME]
+    assert shapely.get_num_geometries(layer.geometry.iloc[1]) == 2
+
+
+def test_no_male_feature_without_male_streets():
+    layer = gender_layer(streets(['female', 'unknown']))
+    assert layer.name.tolist() == ['Via 0'] and not layer.geometry.is_empty.any()
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_lengths import grid_districts
+from gender_streets import lengths
+from gender_streets.lengths import district_lengths, street_lengths, utm_streets
+from gender_streets.streets import load_from_disk
+
+
+@pytest.fixture(scope='module')
+def streets():
+    streets = load_from_disk('Collegno')
+    return streets.assign(gender=np.resize(['female', 'male', 'unknown'], len(streets)))
+
+
+def test_districts_add_up_to_the_city(streets):
+    table = district_lengths(streets, grid_districts(streets, 3))
+    assert np.isclose(table.total.sum(), street_lengths(streets).sum(), rtol=1e-6)
+
+
+def test_given_projection_is_reused(streets, monkeypatch):
+    districts, utm = grid_districts(streets, 3), utm_streets(streets)
+    expected = street_lengths(streets), district_lengths(streets, districts)
+    monkeypatch.setattr(lengths, 'to_utm', lambda geometry: pytest.fail('projected again'))
+    pd.testing.assert_series_equal(street_lengths(streets, utm), expected[0])
+    pd.testing.assert_frame_equal(district_lengths(streets, districts, utm=utm), expected[1])
+
+
+def test_district_areas_and_densities(streets):
+    districts = grid_districts(streets, 3)
+    table = district_lengths(streets, districts)
+    city = districts.dissolve().to_crs(utm_streets(streets).crs).area.iloc[0] / 1e6
+    assert np.isclose(table.area_km2.sum(), city, rtol=1e-6)
+    assert np.allclose(table.female_km_per_km2, table.female / 1000 / table.area_km2)
@@ -0,0 +1,14 @@
+import geopandas as gpd
+import pytest
+
+from gender_streets import DATA_DIR, bundled_cities
+from gender_streets.classifier import SPACY_MODELS, guess_gender, guess_genders, strip_names
+
+
+@pytest.mark.parametrize('country', list(SPACY_MODELS))
+@pytest.mark.parametrize('city', bundled_cities())
+def test_lookup_matches_detector(city, country, detector):
+    names = gpd.read_file(DATA_DIR / f'{city}.geojson').name.astype(str).unique()
+    tokens = strip_names(names, country)
+    expected = tokens.map(lambda t: guess_gender(t, detector, country))
+    assert (guess_genders(tokens, detector, country) == expected).all()
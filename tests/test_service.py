@@ -0,0 +1,28 @@
+import pytest
+from starlette.testclient import TestClient
+
+from gender_streets.service import create_app
+
+
+@pytest.fixture(scope='module')
+def client(person_model):
+    with TestClient(create_app(workers=1, model=person_model)) as client:
+        yield client
+
+
+def test_classify(client):
+    response = client.post('/classify', json={'names': ['Via Anna Frank', 'Via Roma'], 'country': 'italy'})
+    assert response.status_code == 200
+    assert response.json()['genders'] == {'Via Anna Frank': 'female', 'Via Roma': 'unknown'}
+
+
+@pytest.mark.parametrize('payload', [{'names': 'abc'}, {'names': {'a': 1}}, ['Via Roma'], {'country': 'italy'}])
+def test_classify_rejects_anything_but_a_list(client, payload):
+    assert client.post('/classify', json=payload).status_code == 400
+
+
+def test_metrics_include_the_workers(client):
+    client.post('/classify', json={'names': ['Via Giuseppe Garibaldi']})
+    text = client.get('/metrics').text
+    assert 'gender_streets_stage_calls_total{stage="ner"}' in text
+    assert 'gender_streets_names_classified_total' in text
@@ -0,0 +1,14 @@
+import pytest
+
+from gender_streets.streets import classified_city, has_local_data
+
+
+def test_bundled_city_has_local_data():
+    assert has_local_data('Susa', 'italy')
+
+
+# Listed cities without data are analyzed like typed ones instead of failing the page
+def test_listed_city_without_data():
+    assert not has_local_data('Genova', 'italy')
+    with pytest.raises(LookupError):
+        classified_city('Genova', 'italy', lambda: pytest.fail('no model needed'))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import shapely
+
+from gender_streets import bundled_cities
+from gender_streets.streets import load_from_disk
+from gender_streets.topojson import feature_geometry, to_topojson
+
+
+@pytest.mark.parametrize('city', [city.title() for city in bundled_cities()])
+def test_features_round_trip(city):
+    streets = load_from_disk(city)
+    topology = to_topojson(streets)
+    features = topology['objects']['streets']['geometries']
+    assert len(features) == len(streets)
+
+    # Compared on the quantization grid; closed parts come back rotated by normalize, so only their shape is compared
+    scale, translate = topology['transform']['scale'], topology['transform']['translate']
+    def on_grid(geometry):
+        return shapely.get_parts(shapely.transform(geometry, lambda xy: np.round((xy - translate) / scale)))
+
+    for geometry, feature in zip(streets.geometry, features):
+        original, decoded = on_grid(geometry), on_grid(feature_geometry(topology, feature))
+        assert len(original) == len(decoded)
+        for a, b in zip(original, decoded):
+            assert a.equals(b) if a.is_closed else a.equals_exact(b, 0)
+
+
+def test_shared_parts_are_one_arc():
+    line = shapely.LineString([(0, 0), (1, 1), (2, 0)])
+    streets = load_from_disk(bundled_cities()[0].title()).iloc[:2].copy()
+    streets.geometry = [line, line.reverse()]
+    topology = to_topojson(streets)
+    features = topology['objects']['streets']['geometries']
+    assert len(topology['arcs']) == 1 and [feature['arcs'] for feature in features] == [[[0]], [[~0]]]
+    decoded = feature_geometry(topology, features[1])
+    assert np.allclose(shapely.get_coordinates(decoded), shapely.get_coordinates(line.reverse()))